@@ -0,0 +1,96 @@
+"""Concurrency vs. latency for API_MODE=sync and API_MODE=async.
+
+Starts the fake OpenAI server and the API (once per mode) as subprocesses,
+then fires /chat requests at increasing concurrency levels.
+
+Run from ``ai_apis/``:
+
+    python -m benchmarks.async_vs_sync --levels 10 40 100 200 --requests 400
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import percentile, serve
+
+
+async def run_level(base: str, concurrency: int, total: int) -> Dict[str, float]:
+    payload = {
+        "character_name": "Bench Character",
+        "role": "Bench Character",
+        "user_message": "Hello there",
+        "history": [],
+    }
+    latencies: List[float] = []
+    errors = 0
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker(http: httpx.AsyncClient):
+        nonlocal errors
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                res = await http.post(f"{base}/chat", json=payload)
+                if res.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120.0) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 40, 100, 200])
+    parser.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="fake upstream latency")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    with serve("benchmarks.fake_openai:app", 8765, {"FAKE_OPENAI_LATENCY_MS": str(args.latency_ms)}):
+        api_env = {"OPENAI_BASE_URL": "http://127.0.0.1:8765/v1", "OPENAI_API_KEY": "bench"}
+        for port, mode in enumerate(args.modes, start=8766):
+            with serve("main:app", port, {**api_env, "API_MODE": mode, "UPSTREAM_CONCURRENCY": "1000"}):
+                api = f"http://127.0.0.1:{port}"
+                results[mode] = [asyncio.run(run_level(api, c, max(c, args.requests))) for c in args.levels]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"upstream latency {args.latency_ms:.0f} ms")
+    print(f"{'mode':<6} {'conc':>5} {'rps':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode, rows in results.items():
+        for r in rows:
+            print(f"{mode:<6} {r['concurrency']:>5} {r['rps']:>8} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Process and measurement helpers shared by the benchmark scripts."""
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+# ai_apis/, where main.py lives
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def serve(app: str, port: int, env: Dict[str, str]) -> Iterator[subprocess.Popen]:
+    """Run ``uvicorn app`` from ai_apis/ until the block exits; waits for /docs to answer."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=HERE,
+        env={**os.environ, **env},
+    )
+    try:
+        deadline = time.time() + 20
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1.0)
+                break
+            except httpx.HTTPError:
+                if time.time() > deadline or proc.poll() is not None:
+                    raise RuntimeError(f"{app} failed to start")
+                time.sleep(0.2)
+        yield proc
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def memory_mb(pid: int) -> Dict[str, Optional[float]]:
+    """Current and peak RSS of a process (Linux /proc; None elsewhere)."""
+    out: Dict[str, Optional[float]] = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    out["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("VmHWM:"):
+                    out["peak_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return out
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
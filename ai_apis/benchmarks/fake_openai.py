@@ -0,0 +1,179 @@
+"""Local stand-in for the OpenAI chat-completions endpoint.
+
+Point the API at it with ``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``.
+
+Behaviour is configured through the environment:
+
+    FAKE_OPENAI_LATENCY_MS         time to first token (default 200)
+    FAKE_OPENAI_TOKENS_PER_SEC     generation rate after the first token (default 0 = instant)
+    FAKE_OPENAI_COMPLETION_TOKENS  tokens in a chat reply (default 40)
+    FAKE_OPENAI_MALFORMED_RATE     share of tool calls with broken ``arguments`` (default 0)
+    FAKE_OPENAI_CACHED_RATE        share of prompt tokens reported as cached (default 0)
+    FAKE_OPENAI_SEED               RNG seed, so malformed responses repeat across runs (default 0)
+
+``GET /stats`` returns upstream call counts by kind; ``POST /stats/reset`` clears them.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import Counter
+
+LATENCY_MS = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "200"))
+TOKENS_PER_SEC = float(os.getenv("FAKE_OPENAI_TOKENS_PER_SEC", "0"))
+COMPLETION_TOKENS = int(os.getenv("FAKE_OPENAI_COMPLETION_TOKENS", "40"))
+MALFORMED_RATE = float(os.getenv("FAKE_OPENAI_MALFORMED_RATE", "0"))
+CACHED_RATE = float(os.getenv("FAKE_OPENAI_CACHED_RATE", "0"))
+
+app = FastAPI(title="Fake OpenAI")
+_ids = itertools.count(1)
+_rng = random.Random(int(os.getenv("FAKE_OPENAI_SEED", "0")))
+_stats: Counter = Counter()
+
+# Shapes of bad `arguments` that handle_tool_calls has to survive
+MALFORMED_ARGUMENTS = ('{"background": "trunc', "", "null", "[1, 2]", '"just a string"', "{not json}")
+
+
+def _facts(name: str) -> dict:
+    return {
+        "background": f"{name} is a benchmark character.",
+        "notable_works": "Load tests",
+        "occupation": "Stub",
+        "first_appearance": "2024",
+        "era": "Modern",
+    }
+
+
+def _arguments(args: dict) -> str:
+    if MALFORMED_RATE and _rng.random() < MALFORMED_RATE:
+        _stats["malformed_arguments"] += 1
+        return _rng.choice(MALFORMED_ARGUMENTS)
+    return json.dumps(args)
+
+
+def _tool_call(n: int, i: int, args: dict) -> dict:
+    return {
+        "id": f"call_{n}_{i}",
+        "type": "function",
+        "function": {"name": "get_character_profile_information", "arguments": _arguments(args)},
+    }
+
+
+def _prompt_tokens(body: dict) -> int:
+    return sum(len(str(m.get("content") or "")) for m in body.get("messages", [])) // 4 + 1
+
+
+def _usage(body: dict, completion_tokens: int) -> dict:
+    prompt = _prompt_tokens(body)
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": int(prompt * CACHED_RATE)},
+    }
+
+
+def _generation_seconds(tokens: int) -> float:
+    return tokens / TOKENS_PER_SEC if TOKENS_PER_SEC > 0 else 0.0
+
+
+def _classify(body: dict) -> str:
+    tools = body.get("tools") or []
+    if tools:
+        params = tools[0].get("function", {}).get("parameters", {})
+        return "batch_facts" if "character_name" in params.get("properties", {}) else "facts"
+    first = str((body.get("messages") or [{}])[0].get("content") or "")
+    if first.startswith("Summarize"):
+        return "summary"
+    return "chat_stream" if body.get("stream") else "chat"
+
+
+def _tool_message(body: dict, kind: str, n: int) -> dict:
+    user = str(body["messages"][-1].get("content") or "")
+    if kind == "batch_facts":
+        names = [line[2:].strip() for line in user.splitlines() if line.startswith("- ")]
+        calls = [_tool_call(n, i, {"character_name": name, **_facts(name)}) for i, name in enumerate(names)]
+    else:
+        calls = [_tool_call(n, 0, _facts("Someone"))]
+    return {"role": "assistant", "content": None, "tool_calls": calls}
+
+
+def _words(count: int):
+    for i in range(count):
+        yield "Hello" if i == 0 else " there"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    kind = _classify(body)
+    _stats["requests"] += 1
+    _stats[kind] += 1
+    n = next(_ids)
+    created = int(time.time())
+    model = body.get("model", "stub")
+
+    await asyncio.sleep(LATENCY_MS / 1000.0)
+
+    if kind == "chat_stream":
+        return StreamingResponse(_stream(body, n, created, model), media_type="text/event-stream")
+
+    if kind in ("facts", "batch_facts"):
+        message = _tool_message(body, kind, n)
+        finish_reason = "tool_calls"
+        completion_tokens = 30 * len(message["tool_calls"])
+    else:
+        completion_tokens = min(COMPLETION_TOKENS, body.get("max_tokens") or COMPLETION_TOKENS)
+        message = {"role": "assistant", "content": "".join(_words(completion_tokens))}
+        finish_reason = "stop"
+
+    await asyncio.sleep(_generation_seconds(completion_tokens))
+
+    return {
+        "id": f"chatcmpl-{n}",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": _usage(body, completion_tokens),
+    }
+
+
+async def _stream(body: dict, n: int, created: int, model: str):
+    def chunk(choices, usage=None) -> str:
+        payload = {
+            "id": f"chatcmpl-{n}",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": choices,
+        }
+        if usage is not None:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    completion_tokens = min(COMPLETION_TOKENS, body.get("max_tokens") or COMPLETION_TOKENS)
+    delay = _generation_seconds(1)
+    for word in _words(completion_tokens):
+        yield chunk([{"index": 0, "delta": {"content": word}, "finish_reason": None}])
+        if delay:
+            await asyncio.sleep(delay)
+    yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+    if (body.get("stream_options") or {}).get("include_usage"):
+        yield chunk([], usage=_usage(body, completion_tokens))
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/stats")
+def stats():
+    return dict(_stats)
+
+
+@app.post("/stats/reset")
+def reset_stats():
+    _stats.clear()
+    return {}
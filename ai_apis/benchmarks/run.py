@@ -0,0 +1,240 @@
+"""Benchmark suite for the Character Profile API against the fake OpenAI server.
+
+Each scenario runs at every concurrency level and reports RPS,
+p50/p95/p99 latency, errors, upstream call counts and API memory. Results
+are written as JSON tagged with the git commit, so runs can be compared:
+
+    python -m benchmarks.run --out bench-before.json
+    python -m benchmarks.run --out bench-after.json --compare bench-before.json
+
+Run from ``ai_apis/``. Scenarios:
+
+    character_cold  /character with a new name every request (cache misses)
+    character_hot   /character over a few names (cache hits)
+    chat            /chat with facts looked up server-side and a short history
+    chat_stream     /chat/stream; also reports time to first token
+    chat_session    /sessions/{id}/chat; sessions are seeded with the same history up front
+    batch           /characters/batch with 20 names, half of them repeated
+"""
+import argparse
+import asyncio
+import json
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import git_commit, memory_mb, percentile, serve
+
+SCENARIOS = ("character_cold", "character_hot", "chat", "chat_stream", "chat_session", "batch")
+FAKE_PORT = 8765
+API_PORT = 8766
+
+HISTORY = [
+    {"role": "user" if i % 2 == 0 else "assistant", "content": f"Turn {i}: tell me more about your work."}
+    for i in range(8)
+]
+
+
+def _request_for(scenario: str, tag: str, i: int, sessions: List[str]) -> Dict[str, Any]:
+    if scenario == "character_cold":
+        return {"path": "/character", "json": {"character_name": f"Bench Person {tag}-{i}"}}
+    if scenario == "character_hot":
+        return {"path": "/character", "json": {"character_name": f"Hot Person {i % 5}"}}
+    if scenario in ("chat", "chat_stream"):
+        name = f"Chat Person {i % 10}"
+        body = {"character_name": name, "role": name, "user_message": "What are you known for?", "history": HISTORY}
+        return {"path": "/chat/stream" if scenario == "chat_stream" else "/chat", "json": body, "stream": scenario == "chat_stream"}
+    if scenario == "chat_session":
+        return {"path": f"/sessions/{sessions[i % len(sessions)]}/chat", "json": {"user_message": "What are you known for?"}}
+    if scenario == "batch":
+        names = [f"Batch Person {i % 10}-{k}" for k in range(10)] + [f"Batch New {tag}-{i}-{k}" for k in range(10)]
+        return {"path": "/characters/batch", "json": {"character_names": names}}
+    raise ValueError(scenario)
+
+
+async def _one(http: httpx.AsyncClient, base: str, req: Dict[str, Any]):
+    """Returns (ok, latency_ms, ttft_ms or None)."""
+    start = time.perf_counter()
+    ttft = None
+    if req.get("stream"):
+        async with http.stream("POST", f"{base}{req['path']}", json=req["json"]) as res:
+            ok = res.status_code == 200
+            async for line in res.aiter_lines():
+                if ttft is None and line.startswith("event: token"):
+                    ttft = (time.perf_counter() - start) * 1000.0
+                if line.startswith("event: error"):
+                    ok = False
+    else:
+        res = await http.post(f"{base}{req['path']}", json=req["json"])
+        ok = res.status_code == 200
+        if ok and req["path"] == "/characters/batch":
+            ok = res.json().get("failed", 0) == 0
+    return ok, (time.perf_counter() - start) * 1000.0, ttft
+
+
+async def _create_sessions(http: httpx.AsyncClient, base: str) -> List[str]:
+    sessions = []
+    for k in range(10):
+        name = f"Chat Person {k}"
+        res = await http.post(f"{base}/sessions", json={"character_name": name, "role": name, "history": HISTORY})
+        res.raise_for_status()
+        sessions.append(res.json()["session_id"])
+    return sessions
+
+
+async def run_level(base: str, scenario: str, concurrency: int, total: int, tag: str) -> Dict[str, Any]:
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+    sessions: List[str] = []
+
+    async def worker(http: httpx.AsyncClient):
+        nonlocal errors
+        for i in counter:
+            try:
+                ok, latency, ttft = await _one(http, base, _request_for(scenario, tag, i, sessions))
+            except httpx.HTTPError:
+                ok, latency, ttft = False, 0.0, None
+            errors += 0 if ok else 1
+            if latency:
+                latencies.append(latency)
+            if ttft is not None:
+                ttfts.append(ttft)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120.0) as http:
+        if scenario == "chat_session":
+            sessions = await _create_sessions(http, base)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    row: Dict[str, Any] = {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+    if ttfts:
+        row["ttft_p50_ms"] = round(percentile(ttfts, 50), 1)
+        row["ttft_p99_ms"] = round(percentile(ttfts, 99), 1)
+    return row
+
+
+def _upstream_stats(reset: bool = False) -> Dict[str, int]:
+    base = f"http://127.0.0.1:{FAKE_PORT}"
+    if reset:
+        httpx.post(f"{base}/stats/reset")
+        return {}
+    return httpx.get(f"{base}/stats").json()
+
+
+def run_suite(args) -> Dict[str, Any]:
+    fake_env = {
+        "FAKE_OPENAI_LATENCY_MS": str(args.latency_ms),
+        "FAKE_OPENAI_TOKENS_PER_SEC": str(args.tokens_per_sec),
+        "FAKE_OPENAI_MALFORMED_RATE": str(args.malformed_rate),
+        "FAKE_OPENAI_SEED": str(args.seed),
+    }
+    api_env = {
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{FAKE_PORT}/v1",
+        "OPENAI_API_KEY": "bench",
+        "FACTS_CACHE_BACKEND": "memory",
+        "SESSION_STORE_BACKEND": "memory",
+    }
+
+    results = []
+    with serve("benchmarks.fake_openai:app", FAKE_PORT, fake_env):
+        for mode in args.modes:
+            with serve("main:app", API_PORT, {**api_env, "API_MODE": mode}) as api_proc:
+                base = f"http://127.0.0.1:{API_PORT}"
+                for scenario in args.scenarios:
+                    for concurrency in args.levels:
+                        _upstream_stats(reset=True)
+                        total = max(concurrency, args.requests)
+                        tag = f"{mode}-{concurrency}"
+                        row = asyncio.run(run_level(base, scenario, concurrency, total, tag))
+                        upstream = _upstream_stats()
+                        row = {
+                            "mode": mode,
+                            "scenario": scenario,
+                            "concurrency": concurrency,
+                            **row,
+                            "upstream_calls": upstream.get("requests", 0),
+                            "upstream_by_kind": {k: v for k, v in upstream.items() if k != "requests"},
+                            **memory_mb(api_proc.pid),
+                        }
+                        results.append(row)
+                        print(_format_row(row), flush=True)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                k: getattr(args, k)
+                for k in ("modes", "scenarios", "levels", "requests", "latency_ms", "tokens_per_sec", "malformed_rate", "seed")
+            },
+        },
+        "results": results,
+    }
+
+
+def _format_row(row: Dict[str, Any]) -> str:
+    ttft = f" ttft_p50={row['ttft_p50_ms']}ms" if "ttft_p50_ms" in row else ""
+    return (
+        f"{row['mode']:<5} {row['scenario']:<14} c={row['concurrency']:<4} rps={row['rps']:<7} "
+        f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms p99={row['p99_ms']}ms{ttft} "
+        f"errors={row['errors']} upstream={row['upstream_calls']} rss={row['rss_mb']}MB"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    key: Callable[[Dict[str, Any]], tuple] = lambda r: (r["mode"], r["scenario"], r["concurrency"])
+    before = {key(r): r for r in baseline["results"]}
+    print(f"\ncompared with {baseline['meta'].get('commit')} (negative latency / positive rps is better)")
+    for row in current["results"]:
+        old: Optional[Dict[str, Any]] = before.get(key(row))
+        if old is None:
+            continue
+        deltas = []
+        for metric in ("rps", "p50_ms", "p99_ms", "upstream_calls"):
+            if old.get(metric):
+                deltas.append(f"{metric} {100.0 * (row[metric] - old[metric]) / old[metric]:+.1f}%")
+        print(f"{row['mode']:<5} {row['scenario']:<14} c={row['concurrency']:<4} " + "  ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="fake time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0, help="fake generation rate")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="share of broken tool-call arguments")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
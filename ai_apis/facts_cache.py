@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_name(name: str) -> str:
+    # "albert einstein" and "  Albert   Einstein " share one cache entry
+    return " ".join(name.split()).casefold()
+
+
+class FactsCache:
+    """Base class for character-facts caches.
+
+    Values are plain dicts (``ToolData.dict()``) so backends stay independent
+    of the API models. Keys are normalized with ``normalize_name``.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0  # backend failures, served as misses / skipped writes
+        self._stats_lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        value = self._get(normalize_name(name))
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def peek(self, name: str) -> Optional[Dict[str, Any]]:
+        # Same lookup as ``get`` without counting a hit or miss
+        return self._get(normalize_name(name))
+
+    def set(self, name: str, value: Dict[str, Any]) -> None:
+        evicted = self._set(normalize_name(name), value)
+        if evicted:
+            with self._stats_lock:
+                self.evictions += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    def _count_error(self) -> None:
+        with self._stats_lock:
+            self.errors += 1
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - stored_at > self.ttl_seconds
+
+    # Backend hooks
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryFactsCache(FactsCache):
+    """In-process LRU cache; one copy per worker."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400.0):
+        super().__init__(max_entries, ttl_seconds)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self._expired(stored_at, time.time()):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return dict(value)
+
+    def _set(self, key: str, value: Dict[str, Any]) -> int:
+        evicted = 0
+        with self._lock:
+            self._data[key] = (time.time(), dict(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SqliteFactsCache(FactsCache):
+    """On-disk cache that survives restarts and is shared by uvicorn workers.
+
+    LRU order is tracked with a ``last_used`` column, refreshed at most every
+    ``touch_interval_seconds`` so most hits stay read-only; WAL mode lets
+    several processes read while one writes. A locked or broken database is
+    a miss (or a skipped write), never an error for the caller.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        ttl_seconds: float = 86400.0,
+        touch_interval_seconds: float = 60.0,
+    ):
+        super().__init__(max_entries, ttl_seconds)
+        self.path = path
+        self.touch_interval_seconds = float(touch_interval_seconds)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS facts ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS facts_last_used ON facts(last_used)")
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, stored_at, last_used FROM facts WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, stored_at, last_used = row
+                if self._expired(stored_at, now):
+                    self._conn.execute("DELETE FROM facts WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+                if now - last_used >= self.touch_interval_seconds:
+                    self._conn.execute("UPDATE facts SET last_used = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+            except sqlite3.Error:
+                self._rollback()
+                self._count_error()
+                return None
+        return json.loads(value)
+
+    def _set(self, key: str, value: Dict[str, Any]) -> int:
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO facts (key, value, stored_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM facts WHERE key IN"
+                        " (SELECT key FROM facts ORDER BY last_used ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._rollback()
+                self._count_error()
+                return 0
+        return max(overflow, 0)
+
+    def _rollback(self) -> None:
+        try:
+            self._conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM facts")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()
+        return count
+
+
+def cache_from_env() -> FactsCache:
+    """Build the facts cache from FACTS_CACHE_* environment variables."""
+    backend = os.getenv("FACTS_CACHE_BACKEND", "memory").strip().lower()
+    max_entries = int(os.getenv("FACTS_CACHE_MAX_ENTRIES", "1024"))
+    ttl_seconds = float(os.getenv("FACTS_CACHE_TTL_SECONDS", "86400"))
+
+    if backend == "sqlite":
+        path = os.getenv("FACTS_CACHE_PATH", "facts_cache.sqlite3")
+        touch_interval_seconds = float(os.getenv("FACTS_CACHE_TOUCH_INTERVAL_SECONDS", "60"))
+        return SqliteFactsCache(
+            path,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            touch_interval_seconds=touch_interval_seconds,
+        )
+    if backend == "memory":
+        return MemoryFactsCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise RuntimeError(f"Unknown FACTS_CACHE_BACKEND: {backend!r} (expected 'memory' or 'sqlite')")
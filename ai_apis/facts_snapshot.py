@@ -0,0 +1,137 @@
+"""Read-only, memory-mapped character-facts snapshot.
+
+Layout (little-endian):
+
+    header  MAGIC(8) count(u32) index_offset(u64) blob_offset(u64)
+    index   count x (key_off u32, key_len u32, val_off u32, val_len u32), sorted by key bytes
+    blob    normalized keys and values; a value is the ToolData fields joined by FIELD_SEP
+
+Lookups binary-search the index straight out of the mapping, so opening a
+snapshot costs nothing per record and every worker shares the same pages.
+"""
+import mmap
+import os
+import struct
+import threading
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from facts_cache import normalize_name
+
+MAGIC = b"LPFACTS1"
+FIELDS = ("background", "notable_works", "occupation", "first_appearance", "era")
+FIELD_SEP = "\x1f"
+
+_HEADER = struct.Struct("<8sIQQ")
+_ENTRY = struct.Struct("<IIII")
+
+
+def _encode_value(value: Dict[str, str]) -> bytes:
+    return FIELD_SEP.join(str(value.get(f) or "").replace(FIELD_SEP, " ") for f in FIELDS).encode("utf-8")
+
+
+def write_snapshot(path: str, records: Iterable[Tuple[str, Dict[str, str]]]) -> int:
+    """Write (character_name, facts) pairs to ``path`` atomically; later duplicates win."""
+    by_key: Dict[bytes, bytes] = {}
+    for name, value in records:
+        key = normalize_name(name)
+        if key:
+            by_key[key.encode("utf-8")] = _encode_value(value)
+
+    keys = sorted(by_key)
+    index_offset = _HEADER.size
+    blob_offset = index_offset + _ENTRY.size * len(keys)
+
+    blob = bytearray()
+    entries: List[bytes] = []
+    for key in keys:
+        value = by_key[key]
+        key_off = len(blob)
+        blob += key
+        val_off = len(blob)
+        blob += value
+        entries.append(_ENTRY.pack(key_off, len(key), val_off, len(value)))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(keys), index_offset, blob_offset))
+        f.writelines(entries)
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(keys)
+
+
+class FactsSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            # An empty file can't be mapped; treat it (and a torn header) as a corrupt snapshot
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"{path} is not a facts snapshot")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._index, self._blob = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a facts snapshot")
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _key_at(self, i: int) -> bytes:
+        key_off, key_len, _, _ = _ENTRY.unpack_from(self._mm, self._index + i * _ENTRY.size)
+        start = self._blob + key_off
+        return self._mm[start:start + key_len]
+
+    def _find(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            return lo
+        return -1
+
+    def get(self, name: str) -> Optional[Dict[str, str]]:
+        i = self._find(normalize_name(name).encode("utf-8"))
+        with self._stats_lock:
+            if i < 0:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if i < 0:
+            return None
+        _, _, val_off, val_len = _ENTRY.unpack_from(self._mm, self._index + i * _ENTRY.size)
+        start = self._blob + val_off
+        values = self._mm[start:start + val_len].decode("utf-8").split(FIELD_SEP)
+        return dict(zip(FIELDS, values))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "size": self.count,
+            "bytes": len(self._mm),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def snapshot_from_env() -> Optional[FactsSnapshot]:
+    """Open FACTS_SNAPSHOT_PATH if it is set and exists; a corrupt snapshot is skipped with a warning."""
+    path = os.getenv("FACTS_SNAPSHOT_PATH", "").strip()
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return FactsSnapshot(path)
+    except ValueError as e:
+        # The snapshot is only a warm start; serve from the cache and upstream instead
+        warnings.warn(f"Ignoring FACTS_SNAPSHOT_PATH: {e}")
+        return None
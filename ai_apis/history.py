@@ -0,0 +1,202 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a length heuristic
+    tiktoken = None
+
+# Per-message framing overhead used by chat models (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Turns before a cut that identify its summary; enough to keep unrelated chats apart
+ANCHOR_TURNS = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")  # gpt-4o family
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return math.ceil(len(text) / 4)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    # +3 primes the assistant reply
+    return sum(message_tokens(m) for m in messages) + 3
+
+
+class HistoryPlan:
+    def __init__(
+        self,
+        recent: List[Dict[str, str]],
+        summary: Optional[str] = None,
+        pending: Optional[List[Dict[str, str]]] = None,
+        key: Optional[str] = None,
+    ):
+        self.recent = recent        # turns sent verbatim
+        self.summary = summary      # cached summary of everything before `recent` (or before `pending`)
+        self.pending = pending or []  # older turns still to be folded into `summary`
+        self.key = key              # where to remember the folded summary
+
+
+class HistoryManager:
+    """Fit chat history into a token budget.
+
+    Turns that no longer fit are replaced by a rolling summary. A summary is
+    cached under the conversation's ``scope`` (character, role and system
+    prompt) plus the turns just before its cut (``ANCHOR_TURNS`` of them), not
+    the whole prefix, so it is still found after the client's window drops
+    older turns from the front but never served to another conversation type. It is only (re)computed when the recent turns
+    outgrow the budget, and then only over the turns that fell out since the
+    last cached cut, folded onto that cut's summary.
+    """
+
+    def __init__(self, budget_tokens: int = 1500, summary_tokens: int = 150, cache_size: int = 1024):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def remember(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+
+    @staticmethod
+    def _anchor_keys(history: List[Dict[str, str]], scope: str) -> List[Optional[str]]:
+        # keys[i] identifies a cut before history[i] by its scope and the ANCHOR_TURNS turns preceding it
+        scope_digest = hashlib.sha1(scope.encode()).digest()
+        digests = []
+        for m in history:
+            h = hashlib.sha1()
+            h.update(m["role"].encode())
+            h.update(b"\0")
+            h.update(m["content"].encode())
+            digests.append(h.digest())
+        keys: List[Optional[str]] = [None]
+        for i in range(1, len(history) + 1):
+            keys.append(hashlib.sha1(scope_digest + b"".join(digests[max(0, i - ANCHOR_TURNS):i])).hexdigest())
+        return keys
+
+    @staticmethod
+    def _suffix_tokens(history: List[Dict[str, str]]) -> List[int]:
+        # suffix[i] = tokens of history[i:]
+        suffix = [0] * (len(history) + 1)
+        for i in range(len(history) - 1, -1, -1):
+            suffix[i] = suffix[i + 1] + message_tokens(history[i])
+        return suffix
+
+    @property
+    def _recent_budget(self) -> int:
+        return max(0, self.budget_tokens - self.summary_tokens - MESSAGE_OVERHEAD_TOKENS)
+
+    def plan(self, history: List[Dict[str, str]], scope: str = "") -> HistoryPlan:
+        suffix = self._suffix_tokens(history)
+        recent_budget = self._recent_budget
+        first_fit = next(i for i in range(len(history) + 1) if suffix[i] <= recent_budget)
+        keys = self._anchor_keys(history, scope)
+
+        # Reuse an existing cut while the turns after it still fit; the client may
+        # already have dropped some of the turns it summarizes
+        for i in range(first_fit, len(history) + 1):
+            summary = self._cached(keys[i])
+            if summary is not None:
+                return HistoryPlan(recent=history[i:], summary=summary)
+
+        if suffix[0] <= self.budget_tokens:
+            return HistoryPlan(recent=list(history))
+
+        # New cut: slide to a low watermark so the next few turns reuse this summary
+        cut = next(i for i in range(first_fit, len(history) + 1) if suffix[i] <= recent_budget * 3 // 4)
+
+        # Fold only the turns after the newest cached cut, on top of its summary
+        base = 0
+        base_summary = None
+        for j in range(cut - 1, 0, -1):
+            base_summary = self._cached(keys[j])
+            if base_summary is not None:
+                base = j
+                break
+
+        return HistoryPlan(
+            recent=history[cut:],
+            summary=base_summary,
+            pending=history[base:cut],
+            key=keys[cut],
+        )
+
+    def fold_point(self, turns: List[Dict[str, str]], has_summary: bool, max_turns: int) -> int:
+        """Number of leading turns a session should fold into its own summary.
+
+        Sessions keep one rolling summary instead of looking cuts up by anchor.
+        Once there are more than ``max_turns`` turns, or they outgrow the
+        budget, fold down to a low watermark (half of ``max_turns``, 3/4 of the
+        budget) so the next few turns need no summary call.
+        """
+        suffix = self._suffix_tokens(turns)
+        # Keep whole user/assistant pairs
+        cut = len(turns) - max_turns // 4 * 2 if len(turns) > max_turns else 0
+        budget = self._recent_budget if has_summary or cut else self.budget_tokens
+        if suffix[cut] <= budget:
+            return cut
+        watermark = self._recent_budget * 3 // 4
+        return next(i for i in range(cut, len(turns) + 1) if suffix[i] <= watermark)
+
+    def summary_request(self, plan: HistoryPlan) -> List[Dict[str, str]]:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in plan.pending)
+        if plan.summary:
+            transcript = f"Summary so far: {plan.summary}\n\nNew turns:\n{transcript}"
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "Summarize this conversation so it can be continued later. Keep names, facts the user "
+                    "shared, questions still open and the tone. Write plain prose, no preamble."
+                ),
+            },
+            {"role": "user", "content": transcript},
+        ]
+
+
+def summary_message(summary: str) -> Dict[str, str]:
+    return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+
+def history_manager_from_env() -> HistoryManager:
+    """Build the history manager from HISTORY_* environment variables."""
+    return HistoryManager(
+        budget_tokens=int(os.getenv("HISTORY_TOKEN_BUDGET", "1500")),
+        summary_tokens=int(os.getenv("HISTORY_SUMMARY_TOKENS", "150")),
+        cache_size=int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", "1024")),
+    )
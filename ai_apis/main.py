@@ -1,10 +1,23 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Union
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APITimeoutError, AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
 from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from facts_cache import SqliteFactsCache, cache_from_env, normalize_name
+from facts_snapshot import snapshot_from_env
+from single_flight import AsyncSingleFlight, SingleFlight
+from history import HistoryPlan, count_message_tokens, history_manager_from_env, summary_message
+from metrics import MetricsMiddleware, observe_usage, register_collector, render_latest, span
+from prompts import PromptCacheStats, cached_tokens, prompt_cache_key, render_system_message
+from sessions import ChatSession, SqliteSessionStore, session_store_from_env
+import asyncio
+import hashlib
+import httpx
 import os
 import json
 
@@ -13,9 +26,59 @@ load_dotenv(override=True)
 if not os.getenv("OPENAI_API_KEY"):
     raise RuntimeError("Please set OPENAI_API_KEY in your environment or .env file")
 
-client = OpenAI()
 MODEL = "gpt-4o-mini"
 
+# API_MODE=async serves requests from the event loop with a shared AsyncOpenAI client
+# instead of holding a threadpool worker for every blocking OpenAI call.
+ASYNC_MODE = os.getenv("API_MODE", "sync").strip().lower() == "async"
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", "100"))
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "30"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "1"))
+# Async calls also get an overall deadline; it has to outlast every SDK attempt plus the
+# SDK's retry backoff (at most 8 s each), or UPSTREAM_MAX_RETRIES would never get to run
+UPSTREAM_DEADLINE_SECONDS = UPSTREAM_TIMEOUT_SECONDS * (UPSTREAM_MAX_RETRIES + 1) + 8.0 * UPSTREAM_MAX_RETRIES
+BATCH_MAX_NAMES = int(os.getenv("BATCH_MAX_NAMES", "5000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", str(UPSTREAM_CONCURRENCY)))
+
+# Same deadline for the blocking client, so a slow upstream can't hold a sync worker
+# for the SDK default (600 s per attempt)
+client = OpenAI(timeout=UPSTREAM_TIMEOUT_SECONDS, max_retries=UPSTREAM_MAX_RETRIES)
+
+# Keep every pooled connection alive: a keepalive pool smaller than the burst size
+# makes httpx close and re-open sockets under load.
+async_client = AsyncOpenAI(
+    timeout=UPSTREAM_TIMEOUT_SECONDS,
+    max_retries=UPSTREAM_MAX_RETRIES,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_CONNECTIONS,
+            keepalive_expiry=30.0,
+        ),
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT_SECONDS, connect=5.0),
+    ),
+)
+upstream_semaphore = asyncio.Semaphore(UPSTREAM_CONCURRENCY)
+
+# Character facts are stable; cache them so /chat doesn't re-run the tool call every turn
+facts_cache = cache_from_env()
+# SQLite lookups write (last_used) and commit, so async handlers run them on the threadpool
+FACTS_CACHE_BLOCKING = isinstance(facts_cache, SqliteFactsCache)
+# Optional read-only snapshot built offline by warm_cache.py (memory-mapped, shared by workers)
+facts_snapshot = snapshot_from_env()
+# Concurrent misses for the same character share one upstream call
+facts_inflight = SingleFlight()
+facts_inflight_async = AsyncSingleFlight()
+
+# Token-budgeted chat history with cached rolling summaries of older turns
+history_manager = history_manager_from_env()
+# Upstream prompt-cache effectiveness (cached vs. total prompt tokens)
+prompt_cache_stats = PromptCacheStats()
+# Opt-in chat sessions: facts, system prompt and recent turns live server-side
+session_store = session_store_from_env()
+SESSION_STORE_BLOCKING = isinstance(session_store, SqliteSessionStore)
+
 app = FastAPI(title="Character Profile API", version="1.0.0")
 
 # Allow local dev frontends to call this API
@@ -27,6 +90,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+
+# Per-route latency histograms; METRICS_SERVER_TIMING=1 also returns per-stage timings to the caller
+app.add_middleware(
+    MetricsMiddleware,
+    server_timing=os.getenv("METRICS_SERVER_TIMING", "").strip().lower() in ("1", "true", "yes"),
 )
 
 
@@ -54,6 +124,15 @@ def get_character_profile_information(
         "era": _to_text(era, "Unknown"),
     }
 
+# Field values that carry no information: the tool's fallbacks, and what the model
+# answers for characters it doesn't know
+PLACEHOLDER_VALUES = {"N/A", "Unknown"}
+
+
+def is_placeholder_facts(info: "ToolData") -> bool:
+    """True when no field holds real facts, e.g. tool arguments cut off by max_tokens."""
+    return all(value in PLACEHOLDER_VALUES for value in info.dict().values())
+
 # JSON schema describing the tool for OpenAI
 get_character_profile_information_json = {
     "name": "get_character_profile_information",
@@ -90,6 +169,20 @@ get_character_profile_information_json = {
 
 TOOLS = [{"type": "function", "function": get_character_profile_information_json}]
 
+# Batch variant: same tool plus the character it describes, so one completion can answer several names
+_batch_parameters = json.loads(json.dumps(get_character_profile_information_json["parameters"]))
+_batch_parameters["properties"]["character_name"] = {
+    "type": "string",
+    "description": "Exactly one of the requested character names, as given.",
+}
+_batch_parameters["required"] = ["character_name"] + _batch_parameters["required"]
+BATCH_TOOLS = [
+    {
+        "type": "function",
+        "function": {**get_character_profile_information_json, "parameters": _batch_parameters},
+    }
+]
+
 class CharacterRequest(BaseModel):
     character_name: str = Field(..., example="Albert Einstein")
     force_tool: bool = Field(
@@ -104,6 +197,29 @@ class ToolData(BaseModel):
     first_appearance: str
     era: str
 
+class BatchCharacterRequest(BaseModel):
+    character_names: List[str] = Field(..., example=["Albert Einstein", "Sherlock Holmes"])
+    force_tool: bool = True
+    pack_size: int = Field(
+        default=1,
+        ge=1,
+        le=10,
+        description="Characters per upstream completion; >1 asks for one tool call per character in a single request.",
+    )
+
+class BatchCharacterResult(BaseModel):
+    character_name: str
+    ok: bool
+    cached: bool = False
+    data: Optional[ToolData] = None
+    error: Optional[str] = None
+
+class BatchCharacterResponse(BaseModel):
+    results: List[BatchCharacterResult]
+    hits: int
+    misses: int
+    failed: int
+
 class ChatHistoryMessage(BaseModel):
     role: str  # "system" | "user" | "assistant" | "tool"
     content: str
@@ -122,6 +238,25 @@ class ChatResponse(BaseModel):
     character_information: ToolData
     system_role_used: str 
     assistant_text: str
+    prompt_tokens: int = 0  # locally counted tokens of the prompt that was sent
+    cached_prompt_tokens: int = 0  # prompt tokens the upstream served from its prompt cache
+
+class SessionCreateRequest(BaseModel):
+    character_name: str
+    role: str
+    character_information: Optional[ToolData] = None
+    # Seeds the session, e.g. to carry a conversation over after the old session expired
+    history: List[ChatHistoryMessage] = Field(default_factory=list)
+
+class SessionResponse(BaseModel):
+    session_id: str
+    character_information: ToolData
+    system_role_used: str
+    max_turns: int
+    idle_ttl_seconds: float
+
+class SessionChatRequest(BaseModel):
+    user_message: str
 
 # ----------------------------------------------------
 # Small helpers
@@ -151,6 +286,10 @@ def handle_tool_calls(tool_calls) -> List[Dict[str, Any]]:
         else:
             args = {}
 
+        # Valid JSON that isn't an object ("null", "[1, 2]", "\"text\"") carries no fields
+        if not isinstance(args, dict):
+            args = {}
+
         tool_fn = registry.get(tool_name)
         if not callable(tool_fn):
             results.append(
@@ -184,8 +323,15 @@ def handle_tool_calls(tool_calls) -> List[Dict[str, Any]]:
     return results
 
 
-def fetch_character_info(character_name: str, force_tool: bool = True) -> ToolData:
-    messages = [
+def _upstream_error(e: Exception, what: str) -> HTTPException:
+    # Timeouts become 504 so callers can tell a slow upstream from a failing one
+    if isinstance(e, (APITimeoutError, asyncio.TimeoutError)):
+        return HTTPException(status_code=504, detail=f"OpenAI timeout ({what})")
+    return HTTPException(status_code=502, detail=f"OpenAI error ({what}): {getattr(e, 'message', str(e))}")
+
+
+def _facts_messages(character_name: str) -> List[Dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": "You are a narrator who provides character information factually.",
@@ -196,20 +342,25 @@ def fetch_character_info(character_name: str, force_tool: bool = True) -> ToolDa
         },
     ]
 
-    try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=messages,
-            tools=TOOLS,
-            tool_choice="required" if force_tool else "auto",
-            max_tokens=200
-        )
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"OpenAI error: {e}")
 
+def _tool_data_from_response(response) -> Optional[ToolData]:
     msg = response.choices[0].message
 
     if not getattr(msg, "tool_calls", None):
+        return None
+
+    with span("tool_parse"):
+        tool_msgs = handle_tool_calls(msg.tool_calls)
+    if not tool_msgs:
+        raise HTTPException(status_code=500, detail="Tool returned no messages")
+
+    tool_data_dict = json.loads(tool_msgs[0]["content"])
+    return ToolData(**tool_data_dict)
+
+
+def _store_character_info(character_name: str, info: Optional[ToolData]) -> ToolData:
+    if info is None:
+        # Model skipped the tool; don't cache the placeholder so a later forced call can fill it in
         return ToolData(
             background="N/A",
             notable_works="N/A",
@@ -217,69 +368,813 @@ def fetch_character_info(character_name: str, force_tool: bool = True) -> ToolDa
             first_appearance="N/A",
             era="N/A",
         )
+    if is_placeholder_facts(info):
+        # Arguments didn't parse (or carried nothing); the next request retries upstream
+        return info
 
-    tool_msgs = handle_tool_calls(msg.tool_calls)
-    if not tool_msgs:
-        raise HTTPException(status_code=500, detail="Tool returned no messages")
+    facts_cache.set(character_name, info.dict())
+    return info
 
-    tool_data_dict = json.loads(tool_msgs[0]["content"])
-    return ToolData(**tool_data_dict)
 
+def _cached_character_info(character_name: str) -> Optional[ToolData]:
+    cached = facts_cache.get(character_name)
+    if cached is None and facts_snapshot is not None:
+        cached = facts_snapshot.get(character_name)
+    return ToolData(**cached) if cached is not None else None
 
-@app.post("/character", response_model=ToolData)
-def get_character_profile(payload: CharacterRequest):
-    return fetch_character_info(payload.character_name, force_tool=payload.force_tool)
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(payload: ChatRequest):
+def _create_completion(what: str, **kwargs):
+    try:
+        with span(f"upstream_{what}"):
+            response = client.chat.completions.create(**kwargs)
+    except Exception as e:
+        raise _upstream_error(e, what)
+    observe_usage(response.usage, what)
+    return response
+
+
+def _fetch_character_info_upstream(character_name: str, force_tool: bool = True) -> Optional[ToolData]:
+    response = _create_completion(
+        "facts",
+        model=MODEL,
+        messages=_facts_messages(character_name),
+        tools=TOOLS,
+        tool_choice="required" if force_tool else "auto",
+        max_tokens=200
+    )
+    return _tool_data_from_response(response)
+
+
+def _recheck_cache(character_name: str) -> Optional[ToolData]:
+    # The leader runs after the caller's miss; an earlier leader may have stored the facts since
+    cached = facts_cache.peek(character_name)
+    return ToolData(**cached) if cached is not None else None
+
+
+def _load_character_info(character_name: str, force_tool: bool = True) -> ToolData:
+    cached = _recheck_cache(character_name)
+    if cached is not None:
+        return cached
+    info = _fetch_character_info_upstream(character_name, force_tool=force_tool)
+    return _store_character_info(character_name, info)
+
+
+def _fetch_character_info_uncached(character_name: str, force_tool: bool = True) -> ToolData:
+    key = (normalize_name(character_name), force_tool)
+    return facts_inflight.do(key, lambda: _load_character_info(character_name, force_tool=force_tool))
+
+
+def fetch_character_info(character_name: str, force_tool: bool = True) -> ToolData:
+    cached = _cached_character_info(character_name)
+    if cached is not None:
+        return cached
+
+    return _fetch_character_info_uncached(character_name, force_tool=force_tool)
+
+
+# ----------------------------------------------------
+# Async path (API_MODE=async)
+# ----------------------------------------------------
+async def _acreate_completion(what: str, **kwargs):
+    # Bounded concurrency toward OpenAI + hard deadline covering every retry
+    try:
+        async with upstream_semaphore:
+            with span(f"upstream_{what}"):
+                response = await asyncio.wait_for(
+                    async_client.chat.completions.create(**kwargs),
+                    timeout=UPSTREAM_DEADLINE_SECONDS,
+                )
+    except Exception as e:
+        raise _upstream_error(e, what)
+    observe_usage(response.usage, what)
+    return response
+
+
+async def _facts_io(fn: Callable[..., Any], *args):
+    # Keep blocking facts-cache I/O off the event loop
+    if FACTS_CACHE_BLOCKING:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+async def _session_io(fn: Callable[..., Any], *args):
+    # Same for the session store; sync routes already run on the threadpool
+    if SESSION_STORE_BLOCKING:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+async def _aload_character_info(character_name: str, force_tool: bool = True) -> ToolData:
+    cached = await _facts_io(_recheck_cache, character_name)
+    if cached is not None:
+        return cached
+    response = await _acreate_completion(
+        "facts",
+        model=MODEL,
+        messages=_facts_messages(character_name),
+        tools=TOOLS,
+        tool_choice="required" if force_tool else "auto",
+        max_tokens=200,
+    )
+    return await _facts_io(_store_character_info, character_name, _tool_data_from_response(response))
+
+
+async def _afetch_character_info_uncached(character_name: str, force_tool: bool = True) -> ToolData:
+    key = (normalize_name(character_name), force_tool)
+    return await facts_inflight_async.do(key, lambda: _aload_character_info(character_name, force_tool=force_tool))
+
+
+async def afetch_character_info(character_name: str, force_tool: bool = True) -> ToolData:
+    cached = await _facts_io(_cached_character_info, character_name)
+    if cached is not None:
+        return cached
+
+    return await _afetch_character_info_uncached(character_name, force_tool=force_tool)
+
+
+# ----------------------------------------------------
+# Batch facts
+# ----------------------------------------------------
+def _packed_facts_messages(character_names: List[str]) -> List[Dict[str, str]]:
+    listing = "\n".join(f"- {name}" for name in character_names)
+    return [
+        {
+            "role": "system",
+            "content": "You are a narrator who provides character information factually.",
+        },
+        {
+            "role": "user",
+            "content": (
+                "Call get_character_profile_information once for EACH of these characters, with factual "
+                "background information. If you don't know a character, return N/A for each field.\n" + listing
+            ),
+        },
+    ]
+
+
+def _tool_data_by_name(response, character_names: List[str]) -> Dict[str, ToolData]:
+    # Map packed tool calls back to the requested names; unknown names are ignored
+    wanted = {normalize_name(n): n for n in character_names}
+    found: Dict[str, ToolData] = {}
+    for tc in getattr(response.choices[0].message, "tool_calls", None) or []:
+        try:
+            args = json.loads(getattr(tc.function, "arguments", "") or "{}")
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(args, dict):
+            continue
+        key = normalize_name(str(args.pop("character_name", "")))
+        if key not in wanted or key in found:
+            continue
+        fields = {k: args.get(k) for k in ToolData.__fields__}
+        info = ToolData(**get_character_profile_information(**fields))
+        if is_placeholder_facts(info):
+            continue  # not cached; the name falls back to a single lookup
+        facts_cache.set(wanted[key], info.dict())
+        found[key] = info
+    return found
+
+
+def _dedupe_names(character_names: List[str]) -> List[str]:
+    seen = {}
+    for name in character_names:
+        key = normalize_name(name)
+        if key and key not in seen:
+            seen[key] = name.strip()
+    return list(seen.values())
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _batch_response(names: List[str], cached: Dict[str, ToolData], fetched: Dict[str, Any]) -> BatchCharacterResponse:
+    results = []
+    for name in names:
+        key = normalize_name(name)
+        if key in cached:
+            results.append(BatchCharacterResult(character_name=name, ok=True, cached=True, data=cached[key]))
+            continue
+        outcome = fetched.get(key)
+        if isinstance(outcome, ToolData):
+            results.append(BatchCharacterResult(character_name=name, ok=True, data=outcome))
+        else:
+            detail = outcome if isinstance(outcome, str) else "not fetched"
+            results.append(BatchCharacterResult(character_name=name, ok=False, error=detail))
+    return BatchCharacterResponse(
+        results=results,
+        hits=len(cached),
+        misses=len(names) - len(cached),
+        failed=sum(1 for r in results if not r.ok),
+    )
+
+
+def _batch_error(e: BaseException) -> str:
+    return getattr(e, "detail", None) or str(e) or type(e).__name__
+
+
+def _fail_pack(fetched: Dict[str, Any], pack: List[str], e: BaseException) -> None:
+    detail = f"packed lookup failed: {_batch_error(e)}"
+    for name in pack:
+        fetched[normalize_name(name)] = detail
+
+
+def _split_cached(names: List[str]):
+    cached: Dict[str, ToolData] = {}
+    misses: List[str] = []
+    for name in names:
+        hit = _cached_character_info(name)
+        if hit is not None:
+            cached[normalize_name(name)] = hit
+        else:
+            misses.append(name)
+    return cached, misses
+
+
+def _batch_sync(names: List[str], force_tool: bool, pack_size: int) -> BatchCharacterResponse:
+    cached, misses = _split_cached(names)
+    fetched: Dict[str, Any] = {}
+
+    def fetch_one(name: str):
+        try:
+            fetched[normalize_name(name)] = _fetch_character_info_uncached(name, force_tool=force_tool)
+        except Exception as e:
+            fetched[normalize_name(name)] = _batch_error(e)
+
+    def fetch_pack(pack: List[str]):
+        try:
+            response = _create_completion(
+                "batch_facts",
+                model=MODEL,
+                messages=_packed_facts_messages(pack),
+                tools=BATCH_TOOLS,
+                tool_choice="required" if force_tool else "auto",
+                max_tokens=200 * len(pack),
+            )
+            with span("tool_parse"):
+                found = _tool_data_by_name(response, pack)
+        except Exception as e:
+            # Upstream is failing; don't multiply the load with one retry per name
+            _fail_pack(fetched, pack, e)
+            return
+        fetched.update(found)
+        # Names the packed answer left out fall back to a single lookup
+        for name in pack:
+            if normalize_name(name) not in fetched:
+                fetch_one(name)
+
+    with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as pool:
+        if pack_size > 1:
+            list(pool.map(fetch_pack, _chunks(misses, pack_size)))
+        else:
+            list(pool.map(fetch_one, misses))
+
+    return _batch_response(names, cached, fetched)
+
+
+async def _batch_async(names: List[str], force_tool: bool, pack_size: int) -> BatchCharacterResponse:
+    cached, misses = await _facts_io(_split_cached, names)
+    fetched: Dict[str, Any] = {}
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def fetch_one(name: str):
+        try:
+            fetched[normalize_name(name)] = await _afetch_character_info_uncached(name, force_tool=force_tool)
+        except Exception as e:
+            fetched[normalize_name(name)] = _batch_error(e)
+
+    async def fetch_pack(pack: List[str]):
+        async with limit:
+            try:
+                response = await _acreate_completion(
+                    "batch_facts",
+                    model=MODEL,
+                    messages=_packed_facts_messages(pack),
+                    tools=BATCH_TOOLS,
+                    tool_choice="required" if force_tool else "auto",
+                    max_tokens=200 * len(pack),
+                )
+                with span("tool_parse"):
+                    found = await _facts_io(_tool_data_by_name, response, pack)
+            except Exception as e:
+                _fail_pack(fetched, pack, e)
+                return
+            fetched.update(found)
+            for name in pack:
+                if normalize_name(name) not in fetched:
+                    await fetch_one(name)
+
+    async def fetch_limited(name: str):
+        async with limit:
+            await fetch_one(name)
+
+    if pack_size > 1:
+        await asyncio.gather(*(fetch_pack(pack) for pack in _chunks(misses, pack_size)))
+    else:
+        await asyncio.gather(*(fetch_limited(name) for name in misses))
+
+    return _batch_response(names, cached, fetched)
+
+
+# ----------------------------------------------------
+# Chat prompt
+# ----------------------------------------------------
+def _history_dicts(payload: ChatRequest) -> List[Dict[str, str]]:
+    return [{"role": h.role, "content": h.content} for h in payload.history]
+
+
+def _summarize_sync(plan: HistoryPlan) -> Optional[str]:
+    # Fold plan.pending onto plan.summary; None if the upstream call fails
+    try:
+        response = _create_completion(
+            "summary",
+            model=MODEL,
+            messages=history_manager.summary_request(plan),
+            max_tokens=history_manager.summary_tokens,
+        )
+    except Exception:
+        # Summary is best effort; fall back to the turns that fit
+        return None
+    return response.choices[0].message.content or plan.summary
+
+
+async def _summarize_async(plan: HistoryPlan) -> Optional[str]:
+    try:
+        response = await _acreate_completion(
+            "summary",
+            model=MODEL,
+            messages=history_manager.summary_request(plan),
+            max_tokens=history_manager.summary_tokens,
+        )
+    except HTTPException:
+        return None
+    return response.choices[0].message.content or plan.summary
+
+
+def _compact_history_sync(history: List[Dict[str, str]], scope: str):
+    plan = history_manager.plan(history, scope)
+    summary = plan.summary
+    if plan.pending:
+        folded = _summarize_sync(plan)
+        if folded is not None:
+            summary = folded
+            history_manager.remember(plan.key, summary)
+    return summary, plan.recent
+
+
+async def _compact_history(history: List[Dict[str, str]], scope: str):
+    if not ASYNC_MODE:
+        return await run_in_threadpool(_compact_history_sync, history, scope)
+
+    plan = history_manager.plan(history, scope)
+    summary = plan.summary
+    if plan.pending:
+        folded = await _summarize_async(plan)
+        if folded is not None:
+            summary = folded
+            history_manager.remember(plan.key, summary)
+    return summary, plan.recent
+
+
+def _is_character(character_name: str, role: str) -> bool:
+    return role.strip().lower() == character_name.strip().lower()
+
+
+def _chat_messages(system_content: str, summary: Optional[str], recent: List[Dict[str, str]], user_message: str):
+    # system + summary of older turns + recent history + user
+    messages: List[Dict[str, str]] = [{"role": "system", "content": system_content}]
+    if summary:
+        messages.append(summary_message(summary))
+    messages.extend(recent)
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
+def _system_prompt(payload: ChatRequest, info: ToolData):
+    character_name = payload.character_name.strip()
+    is_character = _is_character(character_name, payload.role)
+
+    # Static instructions, then character facts (memoized per character/role/facts)
+    return render_system_message(character_name, is_character, info), is_character
+
+
+def _history_scope(character_name: str, is_character: bool, system_content: str) -> str:
+    # Cached summaries are only reused for the same character, role and system prompt
+    digest = hashlib.sha1(system_content.encode()).hexdigest()
+    return f"{prompt_cache_key(character_name, is_character)}:{digest}"
+
+
+def _build_chat_messages_sync(payload: ChatRequest, info: ToolData):
+    system_content, is_character = _system_prompt(payload, info)
+    scope = _history_scope(payload.character_name, is_character, system_content)
+    summary, recent = _compact_history_sync(_history_dicts(payload), scope)
+    return _chat_messages(system_content, summary, recent, payload.user_message), is_character
+
+
+async def _build_chat_messages(payload: ChatRequest, info: ToolData):
+    system_content, is_character = _system_prompt(payload, info)
+    scope = _history_scope(payload.character_name, is_character, system_content)
+    summary, recent = await _compact_history(_history_dicts(payload), scope)
+    return _chat_messages(system_content, summary, recent, payload.user_message), is_character
+
+
+def _chat_response(info: ToolData, is_character: bool, messages: List[Dict[str, str]], response) -> ChatResponse:
+    return ChatResponse(
+        character_information=info,
+        system_role_used="character" if is_character else "narrator",
+        assistant_text=response.choices[0].message.content or "",
+        prompt_tokens=count_message_tokens(messages),
+        cached_prompt_tokens=prompt_cache_stats.record(response.usage),
+    )
+
+
+def _chat_sync(payload: ChatRequest) -> ChatResponse:
     # 1) Use client-provided info if present; otherwise fetch
     if payload.character_information:
         info = payload.character_information
     else:
-        info = fetch_character_info(payload.character_name, force_tool=True)
+        with span("facts_lookup"):
+            info = fetch_character_info(payload.character_name, force_tool=True)
 
-    info_json = json.dumps(info.dict(), ensure_ascii=False)
+    # 2) Build prompt within the history token budget
+    with span("prompt_build"):
+        messages, is_character = _build_chat_messages_sync(payload, info)
 
-    character_name = payload.character_name.strip()
-    role_in = payload.role.strip()
-    is_character = role_in.lower() == character_name.lower()
-
-    # 2) Softer prompts: greet & be helpful even if info is limited
-    character_system_message = (
-        f"You are {character_name}. Stay strictly in character (tone, knowledge, mannerisms). "
-        f"Use the provided info as ground truth when relevant. "
-        f"Here's initial information: {info_json}. "
-        f"If the user greets or asks something generic, respond naturally as {character_name} "
-        f"If asked for unknown specifics, and you don't know the answer for it, just kindly say so."
-        f"and suggest a related topic you can discuss."
+    # 3) Ask model
+    response = _create_completion(
+        "chat",
+        model=MODEL,
+        messages=messages,
+        max_tokens=200,
+        prompt_cache_key=prompt_cache_key(payload.character_name, is_character),
     )
 
-    narrator_system_message = (
-        f"You are a factual narrator about {character_name}. "
-        f"Be concise and accurate; use the provided info as ground truth. "
-        f"Here's initial information: {info_json}. "
-        f"If the user greets or asks something generic, give a brief friendly reply and offer a short "
-        f"summary about {character_name}. If asked for unknown specifics, and you don't know the answer for it, just kindly say so."
+    return _chat_response(info, is_character, messages, response)
+
+
+async def _resolve_character_info(payload: Union[ChatRequest, SessionCreateRequest]) -> ToolData:
+    if payload.character_information:
+        return payload.character_information
+    with span("facts_lookup"):
+        if ASYNC_MODE:
+            return await afetch_character_info(payload.character_name, force_tool=True)
+        return await run_in_threadpool(fetch_character_info, payload.character_name, force_tool=True)
+
+
+async def _chat_async(payload: ChatRequest) -> ChatResponse:
+    info = await _resolve_character_info(payload)
+
+    with span("prompt_build"):
+        messages, is_character = await _build_chat_messages(payload, info)
+
+    response = await _acreate_completion(
+        "chat",
+        model=MODEL,
+        messages=messages,
+        max_tokens=200,
+        prompt_cache_key=prompt_cache_key(payload.character_name, is_character),
     )
+    return _chat_response(info, is_character, messages, response)
+
+
+# ----------------------------------------------------
+# Chat sessions
+# ----------------------------------------------------
+# Facts and the system prompt are resolved once when the session is created;
+# each turn only carries the new user message and is appended to the session.
+def _get_session(session_id: str) -> ChatSession:
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return session
 
-    system_content = character_system_message if is_character else narrator_system_message
 
-    # 3) Build messages: system + history + user
-    base_messages: List[Dict[str, str]] = [{"role": "system", "content": system_content}]
-    history_dicts = [{"role": h.role, "content": h.content} for h in payload.history]
-    messages = base_messages + history_dicts[-20:]
-    messages.append({"role": "user", "content": payload.user_message})
+def _session_fold(session: ChatSession):
+    # Turns that leave the window are folded into the session's own summary
+    cut = history_manager.fold_point(session.turns, session.summary is not None, session_store.max_turns)
+    plan = HistoryPlan(recent=session.turns[cut:], summary=session.summary, pending=session.turns[:cut])
+    return plan, session.folded + cut
 
-    # 4) Ask model
+
+def _session_history_sync(session: ChatSession):
+    plan, upto = _session_fold(session)
+    summary = plan.summary
+    if plan.pending:
+        folded = _summarize_sync(plan)
+        if folded is not None:
+            # Otherwise the store keeps the turns and the next turn retries
+            summary = folded
+            session_store.fold(session.session_id, summary, upto)
+    return summary, plan.recent
+
+
+async def _session_history(session: ChatSession):
+    if not ASYNC_MODE:
+        return await run_in_threadpool(_session_history_sync, session)
+
+    plan, upto = _session_fold(session)
+    summary = plan.summary
+    if plan.pending:
+        folded = await _summarize_async(plan)
+        if folded is not None:
+            summary = folded
+            await _session_io(session_store.fold, session.session_id, summary, upto)
+    return summary, plan.recent
+
+
+def _session_chat_sync(session_id: str, user_message: str) -> ChatResponse:
+    session = _get_session(session_id)
+    with span("prompt_build"):
+        summary, recent = _session_history_sync(session)
+        messages = _chat_messages(session.system_prompt, summary, recent, user_message)
+
+    response = _create_completion(
+        "chat",
+        model=MODEL,
+        messages=messages,
+        max_tokens=200,
+        prompt_cache_key=prompt_cache_key(session.character_name, session.is_character),
+    )
+    result = _chat_response(ToolData(**session.facts), session.is_character, messages, response)
+    session_store.append(session.session_id, user_message, result.assistant_text)
+    return result
+
+
+async def _session_chat_async(session_id: str, user_message: str) -> ChatResponse:
+    session = await _session_io(_get_session, session_id)
+    with span("prompt_build"):
+        summary, recent = await _session_history(session)
+        messages = _chat_messages(session.system_prompt, summary, recent, user_message)
+
+    response = await _acreate_completion(
+        "chat",
+        model=MODEL,
+        messages=messages,
+        max_tokens=200,
+        prompt_cache_key=prompt_cache_key(session.character_name, session.is_character),
+    )
+    result = _chat_response(ToolData(**session.facts), session.is_character, messages, response)
+    await _session_io(session_store.append, session.session_id, user_message, result.assistant_text)
+    return result
+
+
+# ----------------------------------------------------
+# Streaming chat (server-sent events)
+# ----------------------------------------------------
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _timed_stream(stream):
+    with span("upstream_chat_stream"):
+        async for chunk in stream:
+            yield chunk
+
+
+async def _chat_stream_events(
+    messages: List[Dict[str, str]],
+    cache_key: str,
+    info: ToolData,
+    is_character: bool,
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None,
+):
+    # meta -> token* -> done (or error). The first step takes an upstream slot and opens
+    # the stream; the slot is held until the generator finishes or is closed.
+    await upstream_semaphore.acquire()
     try:
-        response = client.chat.completions.create(model=MODEL, messages=messages, max_tokens=200)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"OpenAI error (chat): {getattr(e, 'message', str(e))}")
+        try:
+            with span("upstream_chat_stream_open"):
+                stream = await asyncio.wait_for(
+                    async_client.chat.completions.create(
+                        model=MODEL,
+                        messages=messages,
+                        max_tokens=200,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        prompt_cache_key=cache_key,
+                    ),
+                    timeout=UPSTREAM_DEADLINE_SECONDS,
+                )
+        except Exception as e:
+            raise _upstream_error(e, "chat_stream")
+
+        usage = None
+        finish_reason = None
+        parts: List[str] = []
+        try:
+            yield _sse(
+                "meta",
+                {
+                    "character_information": info.dict(),
+                    "system_role_used": "character" if is_character else "narrator",
+                    "prompt_tokens": count_message_tokens(messages),
+                },
+            )
+            async for chunk in _timed_stream(stream):
+                if chunk.usage is not None:
+                    prompt_cache_stats.record(chunk.usage)
+                    observe_usage(chunk.usage, "chat_stream")
+                    usage = chunk.usage.model_dump()
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield _sse("token", {"delta": choice.delta.content})
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+            # Record the finished turn before "done", so the client's next turn sees it
+            if on_complete is not None and finish_reason:
+                await on_complete("".join(parts))
+            yield _sse(
+                "done",
+                {
+                    "finish_reason": finish_reason,
+                    "usage": usage,
+                    "cached_prompt_tokens": cached_tokens(usage) if usage else 0,
+                },
+            )
+        except Exception as e:
+            yield _sse("error", {"detail": _upstream_error(e, "chat_stream").detail})
+        finally:
+            await stream.close()
+    finally:
+        # Runs even if close() is cancelled, so a dropped client can't leak the slot
+        upstream_semaphore.release()
 
-    assistant_text = response.choices[0].message.content or ""
 
-    return ChatResponse(
+async def _chat_stream_response(events) -> StreamingResponse:
+    # Run the generator to its first event before responding: upstream failures still
+    # surface as 502/504, and a started generator always runs its cleanup (on close,
+    # or when it is garbage-collected if the client disconnects before the body starts)
+    first = await events.__anext__()
+
+    async def body():
+        try:
+            yield first
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ----------------------------------------------------
+# Routes
+# ----------------------------------------------------
+# In sync mode the blocking path runs on Starlette's threadpool exactly as before;
+# in async mode handlers never leave the event loop.
+@app.post("/character", response_model=ToolData)
+async def get_character_profile(payload: CharacterRequest):
+    if ASYNC_MODE:
+        return await afetch_character_info(payload.character_name, force_tool=payload.force_tool)
+    return await run_in_threadpool(fetch_character_info, payload.character_name, force_tool=payload.force_tool)
+
+@app.post("/characters/batch", response_model=BatchCharacterResponse)
+async def get_character_profiles_batch(payload: BatchCharacterRequest):
+    names = _dedupe_names(payload.character_names)
+    if len(names) > BATCH_MAX_NAMES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_NAMES} distinct names per batch")
+    if ASYNC_MODE:
+        return await _batch_async(names, payload.force_tool, payload.pack_size)
+    return await run_in_threadpool(_batch_sync, names, payload.force_tool, payload.pack_size)
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "facts_cache": facts_cache.stats(),
+        "facts_snapshot": facts_snapshot.stats() if facts_snapshot is not None else None,
+        "prompt_cache": prompt_cache_stats.stats(),
+        "single_flight": (facts_inflight_async if ASYNC_MODE else facts_inflight).stats(),
+        "sessions": session_store.stats(),
+    }
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(payload: ChatRequest):
+    if ASYNC_MODE:
+        return await _chat_async(payload)
+    return await run_in_threadpool(_chat_sync, payload)
+
+@app.post("/chat/stream")
+async def chat_stream(payload: ChatRequest):
+    # Streams through the shared AsyncOpenAI client in both API modes
+    info = await _resolve_character_info(payload)
+    with span("prompt_build"):
+        messages, is_character = await _build_chat_messages(payload, info)
+
+    return await _chat_stream_response(
+        _chat_stream_events(messages, prompt_cache_key(payload.character_name, is_character), info, is_character)
+    )
+
+@app.post("/sessions", response_model=SessionResponse)
+async def create_session(payload: SessionCreateRequest):
+    info = await _resolve_character_info(payload)
+    character_name = payload.character_name.strip()
+    is_character = _is_character(character_name, payload.role)
+    session = await _session_io(
+        session_store.create,
+        character_name,
+        payload.role.strip(),
+        is_character,
+        info.dict(),
+        render_system_message(character_name, is_character, info),
+        [{"role": h.role, "content": h.content} for h in payload.history],
+    )
+    return SessionResponse(
+        session_id=session.session_id,
         character_information=info,
         system_role_used="character" if is_character else "narrator",
-        assistant_text=assistant_text,
+        max_turns=session_store.max_turns,
+        idle_ttl_seconds=session_store.idle_ttl_seconds,
+    )
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    return {"deleted": session_store.delete(session_id)}
+
+@app.post("/sessions/{session_id}/chat", response_model=ChatResponse)
+async def session_chat(session_id: str, payload: SessionChatRequest):
+    if ASYNC_MODE:
+        return await _session_chat_async(session_id, payload.user_message)
+    return await run_in_threadpool(_session_chat_sync, session_id, payload.user_message)
+
+@app.post("/sessions/{session_id}/chat/stream")
+async def session_chat_stream(session_id: str, payload: SessionChatRequest):
+    session = await _session_io(_get_session, session_id)
+    with span("prompt_build"):
+        summary, recent = await _session_history(session)
+        messages = _chat_messages(session.system_prompt, summary, recent, payload.user_message)
+
+    async def record_turn(text: str) -> None:
+        await _session_io(session_store.append, session.session_id, payload.user_message, text)
+
+    return await _chat_stream_response(
+        _chat_stream_events(
+            messages,
+            prompt_cache_key(session.character_name, session.is_character),
+            ToolData(**session.facts),
+            session.is_character,
+            on_complete=record_turn,
+        )
     )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
+
+
+def _collect_cache_counters():
+    stats = facts_cache.stats()
+    for kind in ("hits", "misses", "evictions", "errors"):
+        yield "facts_cache_events_total", {"backend": stats["backend"], "event": kind}, stats[kind]
+    if facts_snapshot is not None:
+        yield "facts_cache_events_total", {"backend": "snapshot", "event": "hits"}, facts_snapshot.hits
+        yield "facts_cache_events_total", {"backend": "snapshot", "event": "misses"}, facts_snapshot.misses
+
+
+def _collect_cache_sizes():
+    yield "facts_cache_entries", {"backend": type(facts_cache).__name__}, len(facts_cache)
+    if facts_snapshot is not None:
+        yield "facts_cache_entries", {"backend": "snapshot"}, len(facts_snapshot)
+
+
+def _collect_single_flight():
+    for mode, flight in (("sync", facts_inflight), ("async", facts_inflight_async)):
+        stats = flight.stats()
+        yield "facts_single_flight_total", {"mode": mode, "outcome": "executed"}, stats["executions"]
+        yield "facts_single_flight_total", {"mode": mode, "outcome": "coalesced"}, stats["coalesced"]
+
+
+def _collect_prompt_render():
+    stats = prompt_cache_stats.stats()
+    yield "prompt_render_cache_total", {"outcome": "hit"}, stats["render_hits"]
+    yield "prompt_render_cache_total", {"outcome": "miss"}, stats["render_misses"]
+
+
+def _collect_session_events():
+    stats = session_store.stats()
+    for kind in ("created", "hits", "misses", "evictions"):
+        yield "chat_session_events_total", {"backend": stats["backend"], "event": kind}, stats[kind]
+
+
+def _collect_session_sizes():
+    yield "chat_sessions", {"backend": type(session_store).__name__}, len(session_store)
+
+
+register_collector("facts_cache_events_total", "counter", "Facts cache lookups and evictions.", _collect_cache_counters)
+register_collector("facts_cache_entries", "gauge", "Entries held by each facts store.", _collect_cache_sizes)
+register_collector("facts_single_flight_total", "counter", "Facts fetches executed vs. coalesced into an in-flight call.", _collect_single_flight)
+register_collector("prompt_render_cache_total", "counter", "Memoized system prompt lookups.", _collect_prompt_render)
+register_collector("chat_session_events_total", "counter", "Chat sessions created, looked up and evicted.", _collect_session_events)
+register_collector("chat_sessions", "gauge", "Live chat sessions.", _collect_session_sizes)
+
+
+@app.on_event("shutdown")
+async def close_upstream_client():
+    await async_client.close()
@@ -0,0 +1,187 @@
+"""Low-overhead in-process metrics with Prometheus text exposition.
+
+Histograms and counters are plain dicts guarded by a lock; ``span`` times a
+block of code into the stage histogram and, when a request is being
+traced, into that request's ``Server-Timing`` header.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Labels, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._series.items()]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by route.")
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent in each request stage.")
+UPSTREAM_TOKENS = Counter("upstream_tokens_total", "Tokens reported by upstream usage, by call and kind.")
+
+_collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+_timings: "contextvars.ContextVar[Optional[List[Tuple[str, float]]]]" = contextvars.ContextVar(
+    "stage_timings", default=None
+)
+
+
+def register_collector(name: str, kind: str, help: str, collect: Callable[[], Iterable[Sample]]) -> None:
+    """Add samples computed at scrape time (e.g. cache counters); ``kind`` is counter or gauge."""
+    _collectors.append((name, kind, help, collect))
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def observe_usage(usage: Any, call: str) -> None:
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            UPSTREAM_TOKENS.inc(value, call=call, kind=kind.replace("_tokens", ""))
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached:
+        UPSTREAM_TOKENS.inc(cached, call=call, kind="cached_prompt")
+
+
+def render_latest() -> str:
+    lines: List[str] = []
+    for metric in (REQUEST_SECONDS, STAGE_SECONDS, UPSTREAM_TOKENS):
+        lines += metric.render()
+    for name, kind, help, collect in _collectors:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for sample_name, labels, value in collect():
+            lines.append(f"{sample_name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template.
+
+    With ``server_timing=True`` the per-stage spans recorded while the
+    handler ran are added as a ``Server-Timing`` response header.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing:
+                    total = time.perf_counter() - start
+                    entries = [f"{name};dur={d * 1000:.1f}" for name, d in timings]
+                    entries.append(f"total;dur={total * 1000:.1f}")
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=path,
+                status=str(status["code"]),
+            )
@@ -0,0 +1,92 @@
+import json
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from facts_cache import normalize_name
+
+# Static instructions come first and never mention the character, so every
+# conversation shares the same prompt prefix; per-character facts follow, then
+# history. Upstream prompt caching matches on the longest identical prefix.
+CHARACTER_INSTRUCTIONS = (
+    "You role-play a character. Stay strictly in character (tone, knowledge, mannerisms). "
+    "Use the character information below as ground truth when relevant. "
+    "If the user greets or asks something generic, respond naturally as the character. "
+    "If asked for unknown specifics, and you don't know the answer for it, just kindly say so "
+    "and suggest a related topic you can discuss."
+)
+
+NARRATOR_INSTRUCTIONS = (
+    "You are a factual narrator about a character. "
+    "Be concise and accurate; use the character information below as ground truth. "
+    "If the user greets or asks something generic, give a brief friendly reply and offer a short "
+    "summary about the character. If asked for unknown specifics, and you don't know the answer for it, just kindly say so."
+)
+
+FACT_FIELDS = ("background", "notable_works", "occupation", "first_appearance", "era")
+
+
+@lru_cache(maxsize=4096)
+def _render(character_name: str, is_character: bool, facts: Tuple[str, ...]) -> str:
+    instructions = CHARACTER_INSTRUCTIONS if is_character else NARRATOR_INSTRUCTIONS
+    info_json = json.dumps(dict(zip(FACT_FIELDS, facts)), ensure_ascii=False)
+    who = f"You are {character_name}." if is_character else f"You narrate about {character_name}."
+    return f"{instructions}\n\nCharacter: {character_name}\n{who}\nCharacter information: {info_json}"
+
+
+def render_system_message(character_name: str, is_character: bool, info: Any) -> str:
+    """Rendered system prompt for a ``ToolData``, memoized per (character, role, facts)."""
+    facts = tuple(str(getattr(info, f, "")) for f in FACT_FIELDS)
+    return _render(character_name, is_character, facts)
+
+
+def prompt_cache_key(character_name: str, is_character: bool) -> str:
+    # Routes turns of the same conversation type to the same upstream cache
+    return f"{'character' if is_character else 'narrator'}:{normalize_name(character_name)}"
+
+
+def cached_tokens(usage: Any) -> int:
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None and isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details")
+    if details is None:
+        return 0
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", None) or 0
+
+
+class PromptCacheStats:
+    """Running totals of upstream prompt tokens vs. the part served from cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    def record(self, usage: Optional[Any]) -> int:
+        if usage is None:
+            return 0
+        prompt = getattr(usage, "prompt_tokens", None)
+        if prompt is None and isinstance(usage, dict):
+            prompt = usage.get("prompt_tokens")
+        cached = cached_tokens(usage)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt or 0
+            self.cached_prompt_tokens += cached
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        info = _render.cache_info()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+                "hit_rate": round(self.cached_prompt_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+                "rendered_system_messages": info.currsize,
+                "render_hits": info.hits,
+                "render_misses": info.misses,
+            }
@@ -0,0 +1,417 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ChatSession:
+    def __init__(
+        self,
+        session_id: str,
+        character_name: str,
+        role: str,
+        is_character: bool,
+        facts: Dict[str, Any],
+        system_prompt: str,
+        turns: Optional[List[Dict[str, str]]] = None,
+        summary: Optional[str] = None,
+        folded: int = 0,
+    ):
+        self.session_id = session_id
+        self.character_name = character_name
+        self.role = role
+        self.is_character = is_character
+        self.facts = facts                  # ToolData.dict(), resolved once at creation
+        self.system_prompt = system_prompt  # rendered once at creation
+        self.turns = turns or []            # turns not yet in `summary`, newest last
+        self.summary = summary              # rolling summary of every turn before `turns`
+        self.folded = folded                # turns folded into `summary` so far
+
+
+class SessionStore:
+    """Base class for server-side chat sessions.
+
+    A session pins the facts and rendered system prompt of one (character,
+    role) conversation and keeps its own rolling summary plus the turns not
+    yet folded into it, so each /chat turn only has to carry the new user
+    message. The chat path folds everything but the newest ``max_turns``
+    turns into the summary (``fold``); until that succeeds the store keeps at
+    most ``2 * max_turns`` unfolded turns and drops the oldest beyond that.
+    Sessions idle for longer than ``idle_ttl_seconds`` expire; the least
+    recently used ones are evicted past ``max_sessions``.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 40, idle_ttl_seconds: float = 3600.0):
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_turns = max(2, int(max_turns))
+        self.idle_ttl_seconds = float(idle_ttl_seconds)
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def create(
+        self,
+        character_name: str,
+        role: str,
+        is_character: bool,
+        facts: Dict[str, Any],
+        system_prompt: str,
+        turns: Iterable[Dict[str, str]] = (),
+    ) -> ChatSession:
+        session = ChatSession(
+            session_id=secrets.token_urlsafe(16),
+            character_name=character_name,
+            role=role,
+            is_character=is_character,
+            facts=dict(facts),
+            system_prompt=system_prompt,
+            turns=[{"role": t["role"], "content": t["content"]} for t in turns][-self._turn_cap:],
+        )
+        evicted = self._create(session)
+        with self._stats_lock:
+            self.created += 1
+            self.evictions += evicted
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        session = self._get(session_id)
+        with self._stats_lock:
+            if session is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return session
+
+    def append(self, session_id: str, user_message: str, assistant_text: str) -> None:
+        # A session that expired mid-turn just drops the turn
+        self._append(
+            session_id,
+            [{"role": "user", "content": user_message}, {"role": "assistant", "content": assistant_text}],
+        )
+
+    def fold(self, session_id: str, summary: str, upto: int) -> bool:
+        """Replace the summary with one covering the first ``upto`` turns ever appended.
+
+        A no-op when a concurrent turn already folded that far.
+        """
+        return self._fold(session_id, summary, upto)
+
+    @property
+    def _turn_cap(self) -> int:
+        return 2 * self.max_turns
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "size": len(self),
+            "max_sessions": self.max_sessions,
+            "max_turns": self.max_turns,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "created": self.created,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _idle(self, last_used: float, now: float) -> bool:
+        return self.idle_ttl_seconds > 0 and now - last_used > self.idle_ttl_seconds
+
+    # Backend hooks
+    def _create(self, session: ChatSession) -> int:
+        raise NotImplementedError
+
+    def _get(self, session_id: str) -> Optional[ChatSession]:
+        raise NotImplementedError
+
+    def _append(self, session_id: str, turns: List[Dict[str, str]]) -> None:
+        raise NotImplementedError
+
+    def _fold(self, session_id: str, summary: str, upto: int) -> bool:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process sessions; a worker only sees the sessions it created."""
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 40, idle_ttl_seconds: float = 3600.0):
+        super().__init__(max_sessions, max_turns, idle_ttl_seconds)
+        # session_id -> [last_used, session]; ordered least recently used first
+        self._data: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _drop_idle(self, now: float) -> None:
+        # LRU order means idle sessions sit at the front
+        while self._data:
+            key, (last_used, _) = next(iter(self._data.items()))
+            if not self._idle(last_used, now):
+                break
+            del self._data[key]
+
+    def _create(self, session: ChatSession) -> int:
+        evicted = 0
+        now = time.time()
+        with self._lock:
+            self._drop_idle(now)
+            self._data[session.session_id] = [now, session]
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def _get(self, session_id: str) -> Optional[ChatSession]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            last_used, session = entry
+            if self._idle(last_used, now):
+                del self._data[session_id]
+                return None
+            entry[0] = now
+            self._data.move_to_end(session_id)
+            return ChatSession(
+                session_id=session.session_id,
+                character_name=session.character_name,
+                role=session.role,
+                is_character=session.is_character,
+                facts=session.facts,
+                system_prompt=session.system_prompt,
+                turns=list(session.turns),
+                summary=session.summary,
+                folded=session.folded,
+            )
+
+    def _append(self, session_id: str, turns: List[Dict[str, str]]) -> None:
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return
+            entry[0] = time.time()
+            session = entry[1]
+            session.turns.extend(turns)
+            overflow = len(session.turns) - self._turn_cap
+            if overflow > 0:
+                del session.turns[:overflow]
+                session.folded += overflow
+            self._data.move_to_end(session_id)
+
+    def _fold(self, session_id: str, summary: str, upto: int) -> bool:
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None or upto <= entry[1].folded:
+                return False
+            session = entry[1]
+            del session.turns[:upto - session.folded]
+            session.folded = upto
+            session.summary = summary
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._data.pop(session_id, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SqliteSessionStore(SessionStore):
+    """On-disk sessions shared by uvicorn workers, so any worker can serve a turn.
+
+    Turns live in their own table, numbered per session by ``seq`` (turns
+    ever appended), so folding drops every turn below the new ``folded`` mark.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_sessions: int = 10000,
+        max_turns: int = 40,
+        idle_ttl_seconds: float = 3600.0,
+    ):
+        super().__init__(max_sessions, max_turns, idle_ttl_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " id TEXT PRIMARY KEY,"
+            " character_name TEXT NOT NULL,"
+            " role TEXT NOT NULL,"
+            " is_character INTEGER NOT NULL,"
+            " facts TEXT NOT NULL,"
+            " system_prompt TEXT NOT NULL,"
+            " summary TEXT,"
+            " folded INTEGER NOT NULL DEFAULT 0,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            " session_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " role TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions(last_used)")
+        self._conn.commit()
+
+    def _delete_where(self, condition: str, params: tuple) -> int:
+        ids = [row[0] for row in self._conn.execute(f"SELECT id FROM sessions WHERE {condition}", params)]
+        for session_id in ids:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return len(ids)
+
+    def _insert_turns(self, session_id: str, turns: List[Dict[str, str]]) -> None:
+        (folded,) = self._conn.execute("SELECT folded FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        (next_seq,) = self._conn.execute(
+            "SELECT COALESCE(MAX(seq) + 1, ?) FROM turns WHERE session_id = ?", (folded, session_id)
+        ).fetchone()
+        self._conn.executemany(
+            "INSERT INTO turns (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+            [(session_id, next_seq + i, t["role"], t["content"]) for i, t in enumerate(turns)],
+        )
+        # Hard cap while folding keeps failing: drop the oldest unfolded turns
+        floor = next_seq + len(turns) - self._turn_cap
+        if floor > folded:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ? AND seq < ?", (session_id, floor))
+            self._conn.execute("UPDATE sessions SET folded = ? WHERE id = ?", (floor, session_id))
+
+    def _create(self, session: ChatSession) -> int:
+        now = time.time()
+        with self._lock:
+            if self.idle_ttl_seconds > 0:
+                self._delete_where("last_used < ?", (now - self.idle_ttl_seconds,))
+            self._conn.execute(
+                "INSERT INTO sessions (id, character_name, role, is_character, facts, system_prompt, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.session_id,
+                    session.character_name,
+                    session.role,
+                    int(session.is_character),
+                    json.dumps(session.facts, ensure_ascii=False),
+                    session.system_prompt,
+                    now,
+                ),
+            )
+            self._insert_turns(session.session_id, session.turns)
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            evicted = 0
+            if count > self.max_sessions:
+                evicted = self._delete_where(
+                    "id IN (SELECT id FROM sessions ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_sessions,),
+                )
+            self._conn.commit()
+        return evicted
+
+    def _get(self, session_id: str) -> Optional[ChatSession]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT character_name, role, is_character, facts, system_prompt, summary, folded, last_used"
+                " FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            character_name, role, is_character, facts, system_prompt, summary, folded, last_used = row
+            if self._idle(last_used, now):
+                self._delete_where("id = ?", (session_id,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE sessions SET last_used = ? WHERE id = ?", (now, session_id))
+            self._conn.commit()
+            turns = [
+                {"role": r, "content": c}
+                for r, c in self._conn.execute(
+                    "SELECT role, content FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)
+                )
+            ]
+        return ChatSession(
+            session_id=session_id,
+            character_name=character_name,
+            role=role,
+            is_character=bool(is_character),
+            facts=json.loads(facts),
+            system_prompt=system_prompt,
+            turns=turns,
+            summary=summary,
+            folded=folded,
+        )
+
+    def _append(self, session_id: str, turns: List[Dict[str, str]]) -> None:
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE sessions SET last_used = ? WHERE id = ?", (time.time(), session_id)
+            ).rowcount
+            if updated:
+                self._insert_turns(session_id, turns)
+            self._conn.commit()
+
+    def _fold(self, session_id: str, summary: str, upto: int) -> bool:
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE sessions SET summary = ?, folded = ? WHERE id = ? AND folded < ?",
+                (summary, upto, session_id, upto),
+            ).rowcount
+            if updated:
+                self._conn.execute("DELETE FROM turns WHERE session_id = ? AND seq < ?", (session_id, upto))
+            self._conn.commit()
+        return bool(updated)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._delete_where("id = ?", (session_id,))
+            self._conn.commit()
+        return deleted > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM turns")
+            self._conn.execute("DELETE FROM sessions")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return count
+
+
+def session_store_from_env() -> SessionStore:
+    """Build the chat session store from SESSION_* environment variables."""
+    backend = os.getenv("SESSION_STORE_BACKEND", "memory").strip().lower()
+    max_sessions = int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+    max_turns = int(os.getenv("SESSION_MAX_TURNS", "40"))
+    idle_ttl_seconds = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+
+    if backend == "sqlite":
+        path = os.getenv("SESSION_STORE_PATH", "sessions.sqlite3")
+        return SqliteSessionStore(path, max_sessions=max_sessions, max_turns=max_turns, idle_ttl_seconds=idle_ttl_seconds)
+    if backend == "memory":
+        return MemorySessionStore(max_sessions=max_sessions, max_turns=max_turns, idle_ttl_seconds=idle_ttl_seconds)
+    raise RuntimeError(f"Unknown SESSION_STORE_BACKEND: {backend!r} (expected 'memory' or 'sqlite')")
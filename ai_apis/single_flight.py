@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs ``fn``; callers that arrive
+    while it is running block and receive the same result or exception.
+    Nothing is remembered once the call finishes - caching is the caller's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+        }
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of ``SingleFlight`` for use inside one event loop."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # The shared call runs in its own task so it outlives whichever caller started it
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # shield: a cancelled caller (the leader included) must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark retrieved so an error nobody else awaited isn't logged as unhandled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
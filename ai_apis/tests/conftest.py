@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The API modules are imported as top-level modules (``from facts_cache import ...``)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("openai")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # main refuses to import without one
+
+import main  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+
+def _facts(name: str) -> dict:
+    return {
+        "background": f"{name} background",
+        "notable_works": "Works",
+        "occupation": "Occupation",
+        "first_appearance": "1900",
+        "era": "Modern",
+    }
+
+
+def _call(arguments):
+    return SimpleNamespace(id="call", function=SimpleNamespace(name="get_character_profile_information", arguments=arguments))
+
+
+def _packed_response(*arguments):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=[_call(a) for a in arguments]))])
+
+
+def _args(name: str, **overrides) -> str:
+    return json.dumps({"character_name": name, **_facts(name), **overrides})
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    main.facts_cache.clear()
+    yield
+    main.facts_cache.clear()
+
+
+def test_dedupe_names_keeps_first_spelling():
+    assert main._dedupe_names(["  Ada Lovelace ", "ada   lovelace", "", "   ", "Alan Turing"]) == [
+        "Ada Lovelace",
+        "Alan Turing",
+    ]
+
+
+def test_tool_data_by_name_maps_and_caches_requested_names():
+    response = _packed_response(
+        _args("ada lovelace"),
+        _args("Ada Lovelace", background="duplicate"),  # first call for a name wins
+        _args("Somebody Else"),  # not requested
+        "null",
+        "[1, 2]",
+        '{"character_name": "Alan Turing", "background": "trunc',
+        json.dumps({"character_name": "Grace Hopper"}),  # every field falls back: placeholder
+    )
+    found = main._tool_data_by_name(response, ["Ada Lovelace", "Alan Turing", "Grace Hopper"])
+
+    assert list(found) == ["ada lovelace"]
+    assert found["ada lovelace"].dict() == _facts("ada lovelace")
+    assert main.facts_cache.peek("Ada Lovelace") == _facts("ada lovelace")
+    assert main.facts_cache.peek("Somebody Else") is None
+    assert main.facts_cache.peek("Grace Hopper") is None
+
+
+def test_batch_response_counts():
+    names = ["Ada", "Alan", "Grace", "Linus"]
+    cached = {"ada": main.ToolData(**_facts("Ada"))}
+    fetched = {"alan": main.ToolData(**_facts("Alan")), "grace": "OpenAI timeout (facts)"}
+    response = main._batch_response(names, cached, fetched)
+
+    assert (response.hits, response.misses, response.failed) == (1, 3, 2)
+    by_name = {r.character_name: r for r in response.results}
+    assert by_name["Ada"].ok and by_name["Ada"].cached
+    assert by_name["Alan"].ok and not by_name["Alan"].cached
+    assert by_name["Grace"].error == "OpenAI timeout (facts)"
+    assert by_name["Linus"].error == "not fetched"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake packed and single lookups for both API modes."""
+    state = SimpleNamespace(packed=[], single=[], response=None, error=None)
+
+    def create(what, **kwargs):
+        state.packed.append(what)
+        if state.error is not None:
+            raise state.error
+        return state.response
+
+    async def acreate(what, **kwargs):
+        return create(what, **kwargs)
+
+    def single(name, force_tool=True):
+        state.single.append(name)
+        return main.ToolData(**_facts(name))
+
+    async def asingle(name, force_tool=True):
+        return single(name, force_tool)
+
+    monkeypatch.setattr(main, "_create_completion", create)
+    monkeypatch.setattr(main, "_acreate_completion", acreate)
+    monkeypatch.setattr(main, "_fetch_character_info_uncached", single)
+    monkeypatch.setattr(main, "_afetch_character_info_uncached", asingle)
+    return state
+
+
+def _run_batch(mode: str, names, pack_size: int):
+    if mode == "sync":
+        return main._batch_sync(names, True, pack_size)
+    return asyncio.run(main._batch_async(names, True, pack_size))
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_names_missing_from_a_packed_answer_fall_back_to_single_lookups(upstream, mode):
+    upstream.response = _packed_response(_args("Ada"))
+    response = _run_batch(mode, ["Ada", "Alan"], pack_size=2)
+
+    assert upstream.packed == ["batch_facts"]
+    assert upstream.single == ["Alan"]
+    assert response.failed == 0
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_failed_pack_fails_every_name_without_retrying(upstream, mode):
+    upstream.error = HTTPException(status_code=504, detail="OpenAI timeout (batch_facts)")
+    response = _run_batch(mode, ["Ada", "Alan", "Grace"], pack_size=3)
+
+    assert upstream.single == []
+    assert response.failed == 3
+    assert all(r.error == "packed lookup failed: OpenAI timeout (batch_facts)" for r in response.results)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_cached_names_skip_upstream(upstream, mode):
+    main.facts_cache.set("Ada", _facts("Ada"))
+    upstream.response = _packed_response(_args("Alan"))
+    response = _run_batch(mode, ["Ada", "Alan"], pack_size=2)
+
+    assert (response.hits, response.misses, response.failed) == (1, 1, 0)
+    assert upstream.single == []
@@ -0,0 +1,53 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("openai")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")  # main refuses to import without one
+
+import main  # noqa: E402
+
+
+def _response(*arguments: str):
+    tool_calls = [
+        SimpleNamespace(id=f"call_{i}", function=SimpleNamespace(name="get_character_profile_information", arguments=a))
+        for i, a in enumerate(arguments)
+    ]
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=tool_calls))])
+
+
+FACTS = {
+    "background": "Mathematician",
+    "notable_works": "Notes on the Analytical Engine",
+    "occupation": "Writer",
+    "first_appearance": "1815",
+    "era": "19th century",
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    main.facts_cache.clear()
+    yield
+    main.facts_cache.clear()
+
+
+@pytest.mark.parametrize("arguments", ['{"background": "trunc', "", "null", "[1, 2]", '"text"', "{}"])
+def test_unparseable_arguments_are_not_cached(arguments):
+    info = main._store_character_info("Ada", main._tool_data_from_response(_response(arguments)))
+    assert main.is_placeholder_facts(info)
+    assert main.facts_cache.peek("Ada") is None
+
+
+def test_parsed_facts_are_cached():
+    info = main._store_character_info("Ada", main._tool_data_from_response(_response(json.dumps(FACTS))))
+    assert info.dict() == FACTS
+    assert main.facts_cache.peek("ada") == FACTS
+
+
+def test_placeholder_facts():
+    assert main.is_placeholder_facts(main.ToolData(**main.get_character_profile_information()))
+    assert not main.is_placeholder_facts(main.ToolData(**FACTS))
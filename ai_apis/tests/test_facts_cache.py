@@ -0,0 +1,145 @@
+import sqlite3
+
+import pytest
+
+import facts_cache
+from facts_cache import MemoryFactsCache, SqliteFactsCache, cache_from_env, normalize_name
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(facts_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path, clock):
+    def make(max_entries=1024, ttl_seconds=86400.0):
+        if request.param == "memory":
+            return MemoryFactsCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        return SqliteFactsCache(
+            str(tmp_path / "facts.sqlite3"), max_entries=max_entries, ttl_seconds=ttl_seconds, touch_interval_seconds=0
+        )
+
+    return make
+
+
+def _facts(name: str) -> dict:
+    return {"background": f"{name} background", "era": "Modern"}
+
+
+def test_normalize_name_collapses_whitespace_and_case():
+    assert normalize_name("  Albert   EINSTEIN ") == "albert einstein"
+    assert normalize_name("Straße") == normalize_name("STRASSE")
+
+
+def test_lookups_are_normalized_and_counted(make_cache):
+    cache = make_cache()
+    assert cache.get("Ada Lovelace") is None
+    cache.set("Ada Lovelace", _facts("Ada"))
+    assert cache.get("  ada   LOVELACE") == _facts("Ada")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert len(cache) == 1
+
+
+def test_peek_does_not_count(make_cache):
+    cache = make_cache()
+    cache.set("Ada", _facts("Ada"))
+    assert cache.peek("ada") == _facts("Ada")
+    assert cache.peek("Nobody") is None
+    stats = cache.stats()
+    assert stats["hits"] == 0 and stats["misses"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.set("a", _facts("a"))
+    clock.now += 1
+    cache.set("b", _facts("b"))
+    clock.now += 1
+    assert cache.get("a") is not None  # "b" is now least recently used
+    clock.now += 1
+    cache.set("c", _facts("c"))
+    assert cache.peek("b") is None
+    assert cache.peek("a") is not None and cache.peek("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl_seconds=60)
+    cache.set("Ada", _facts("Ada"))
+    clock.now += 59
+    assert cache.get("Ada") is not None
+    clock.now += 2
+    assert cache.get("Ada") is None
+    assert len(cache) == 0
+
+
+def test_returned_values_are_copies(make_cache):
+    cache = make_cache()
+    cache.set("Ada", _facts("Ada"))
+    cache.get("Ada")["era"] = "changed"
+    assert cache.get("Ada") == _facts("Ada")
+
+
+def test_sqlite_cache_is_shared_across_connections(tmp_path):
+    path = str(tmp_path / "facts.sqlite3")
+    SqliteFactsCache(path).set("Ada", _facts("Ada"))
+    assert SqliteFactsCache(path).get("ada") == _facts("Ada")
+
+
+def test_sqlite_hits_refresh_last_used_at_most_once_per_interval(tmp_path, clock):
+    cache = SqliteFactsCache(str(tmp_path / "facts.sqlite3"), touch_interval_seconds=60)
+    cache.set("Ada", _facts("Ada"))
+
+    def last_used():
+        return cache._conn.execute("SELECT last_used FROM facts").fetchone()[0]
+
+    clock.now += 30
+    assert cache.get("Ada") is not None
+    assert last_used() == 1000.0
+    clock.now += 30
+    assert cache.get("Ada") is not None
+    assert last_used() == 1060.0
+
+
+class _LockedConnection:
+    def execute(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def rollback(self):
+        pass
+
+
+def test_sqlite_errors_are_misses(tmp_path):
+    cache = SqliteFactsCache(str(tmp_path / "facts.sqlite3"))
+    cache.set("Ada", _facts("Ada"))
+    cache._conn = _LockedConnection()
+
+    assert cache.get("Ada") is None
+    assert cache.peek("Ada") is None
+    cache.set("Grace", _facts("Grace"))  # skipped, not raised
+    assert (cache.misses, cache.errors) == (1, 3)
+
+
+def test_cache_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("FACTS_CACHE_BACKEND", "sqlite")
+    monkeypatch.setenv("FACTS_CACHE_PATH", str(tmp_path / "facts.sqlite3"))
+    monkeypatch.setenv("FACTS_CACHE_MAX_ENTRIES", "7")
+    cache = cache_from_env()
+    assert isinstance(cache, SqliteFactsCache) and cache.max_entries == 7
+
+    monkeypatch.setenv("FACTS_CACHE_BACKEND", "redis")
+    with pytest.raises(RuntimeError):
+        cache_from_env()
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import facts_snapshot
+from facts_snapshot import FactsSnapshot, write_snapshot
+
+
+def _facts(name: str) -> dict:
+    return {
+        "background": f"{name} background",
+        "notable_works": "Works",
+        "occupation": "Occupation",
+        "first_appearance": "1900",
+        "era": "Modern",
+    }
+
+
+def test_round_trip_and_normalized_lookup(tmp_path):
+    path = str(tmp_path / "facts.snapshot")
+    names = ["Albert Einstein", "Sherlock Holmes", "Ada Lovelace", "Émilie du Châtelet"]
+    assert write_snapshot(path, ((n, _facts(n)) for n in names)) == len(names)
+
+    snap = FactsSnapshot(path)
+    try:
+        assert len(snap) == len(names)
+        for name in names:
+            assert snap.get(name) == _facts(name)
+        assert snap.get("  albert   EINSTEIN ") == _facts("Albert Einstein")
+        assert snap.get("Nobody") is None
+        assert snap.stats()["hits"] == len(names) + 1
+        assert snap.stats()["misses"] == 1
+    finally:
+        snap.close()
+
+
+def test_later_duplicates_win_and_separator_is_escaped(tmp_path):
+    path = str(tmp_path / "facts.snapshot")
+    bad = dict(_facts("Ada"), background="line\x1fbreak")
+    write_snapshot(path, [("Ada", _facts("Ada")), ("ada ", bad)])
+
+    snap = FactsSnapshot(path)
+    try:
+        assert len(snap) == 1
+        assert snap.get("Ada")["background"] == "line break"
+    finally:
+        snap.close()
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "facts.snapshot")
+    write_snapshot(path, [])
+    snap = FactsSnapshot(path)
+    try:
+        assert len(snap) == 0
+        assert snap.get("Ada") is None
+    finally:
+        snap.close()
+
+
+@pytest.mark.parametrize("content", [b"", b"LPFA", b"NOTASNAPSHOT" + b"\0" * 32])
+def test_corrupt_file_is_rejected(tmp_path, content):
+    path = tmp_path / "facts.snapshot"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        FactsSnapshot(str(path))
+
+
+def test_snapshot_from_env_skips_corrupt_file(tmp_path, monkeypatch):
+    path = tmp_path / "facts.snapshot"
+    path.write_bytes(b"")
+    monkeypatch.setenv("FACTS_SNAPSHOT_PATH", str(path))
+    with pytest.warns(UserWarning):
+        assert facts_snapshot.snapshot_from_env() is None
+
+    monkeypatch.setenv("FACTS_SNAPSHOT_PATH", str(tmp_path / "missing.snapshot"))
+    assert facts_snapshot.snapshot_from_env() is None
+
+
+def test_write_is_atomic(tmp_path):
+    path = str(tmp_path / "facts.snapshot")
+    write_snapshot(path, [("Ada", _facts("Ada"))])
+    assert not os.path.exists(f"{path}.tmp")
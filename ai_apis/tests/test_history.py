@@ -0,0 +1,101 @@
+from history import HistoryManager, count_message_tokens, summary_message
+
+
+def _turn(i: int):
+    user = {"role": "user", "content": f"Question {i}: " + "tell me more about that period of your life " * 3}
+    assistant = {"role": "assistant", "content": f"Answer {i}: " + "it was a time of hard work and discovery " * 5}
+    return [user, assistant]
+
+
+def _simulate(manager: HistoryManager, turns: int, window=None):
+    """Drive plan() the way /chat does; returns (summary calls, plans)."""
+    transcript = []
+    calls = 0
+    plans = []
+    for t in range(turns):
+        history = transcript[-window:] if window else list(transcript)
+        plan = manager.plan(history)
+        if plan.pending:
+            calls += 1
+            manager.remember(plan.key, f"summary after turn {t}")
+        plans.append(plan)
+        transcript.extend(_turn(t))
+    return calls, plans
+
+
+def test_short_history_is_sent_verbatim():
+    manager = HistoryManager(budget_tokens=1500, summary_tokens=150)
+    history = _turn(0) + _turn(1)
+    plan = manager.plan(history)
+    assert plan.recent == history
+    assert plan.summary is None and not plan.pending
+
+
+def test_plan_fits_budget_once_summarized():
+    manager = HistoryManager(budget_tokens=1500, summary_tokens=150)
+    _, plans = _simulate(manager, 40)
+    for plan in plans:
+        messages = ([summary_message("x" * 600)] if plan.summary or plan.pending else []) + plan.recent
+        assert count_message_tokens(messages) <= 1500 + 3
+
+
+def test_summary_survives_sliding_client_window():
+    full_calls, _ = _simulate(HistoryManager(budget_tokens=1500, summary_tokens=150), 60)
+    windowed_calls, plans = _simulate(HistoryManager(budget_tokens=1500, summary_tokens=150), 60, window=40)
+
+    assert 0 < full_calls < 20
+    assert windowed_calls <= full_calls
+
+    # Every fold after the first builds on the previous summary, so earlier context is kept
+    folds = [p for p in plans if p.pending]
+    assert folds[0].summary is None
+    assert all(p.summary is not None for p in folds[1:])
+
+
+def test_cached_cut_is_reused_until_recent_turns_outgrow_budget():
+    manager = HistoryManager(budget_tokens=1500, summary_tokens=150)
+    _, plans = _simulate(manager, 30)
+    first = next(i for i, p in enumerate(plans) if p.pending)
+    assert plans[first + 1].summary == f"summary after turn {first}"
+    assert not plans[first + 1].pending
+
+
+def test_unrelated_history_does_not_pick_up_a_summary():
+    manager = HistoryManager(budget_tokens=1500, summary_tokens=150)
+    _simulate(manager, 30)
+    other = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+    assert manager.plan(other).summary is None
+
+
+def test_fold_point_slides_to_low_watermark():
+    manager = HistoryManager(budget_tokens=1500, summary_tokens=150)
+    short = _turn(0) + _turn(1)
+    assert manager.fold_point(short, has_summary=False, max_turns=40) == 0
+
+    turns = [m for t in range(20) for m in _turn(t)]
+    cut = manager.fold_point(turns, has_summary=True, max_turns=40)
+    assert cut > 0
+    recent = turns[cut:]
+    assert count_message_tokens(recent) <= (1500 - 150) * 3 // 4 + 3
+    # The turns kept after the fold leave room for the next few turns
+    assert manager.fold_point(recent + _turn(20), has_summary=True, max_turns=40) == 0
+
+
+def test_summaries_do_not_leak_across_conversation_scopes():
+    manager = HistoryManager(budget_tokens=1500, summary_tokens=150)
+    generic = [
+        {"role": "user", "content": "ok"},
+        {"role": "assistant", "content": "Anything else?"},
+        {"role": "user", "content": "no thanks"},
+        {"role": "assistant", "content": "Goodbye!"},
+    ]
+    ada = [{"role": "user", "content": "My SSN is 123-45-6789"}, {"role": "assistant", "content": "Noted."}] + generic
+    ada_scope = "character:ada lovelace:prompt-a"
+    manager.remember(manager._anchor_keys(ada, ada_scope)[len(ada)], "User shared SSN")
+
+    bob = [{"role": "user", "content": "Tell me about your ships"}, {"role": "assistant", "content": "Gladly."}] + generic
+    plan = manager.plan(bob, "narrator:bob:prompt-b")
+    assert plan.summary is None
+    assert plan.recent == bob
+    # Within the same scope the anchor still matches
+    assert manager.plan(bob, ada_scope).summary == "User shared SSN"
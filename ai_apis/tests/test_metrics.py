@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from metrics import Counter, Histogram, MetricsMiddleware, register_collector, render_latest, span
+
+
+def test_histogram_bucket_boundaries_are_inclusive_and_cumulative():
+    hist = Histogram("latency_seconds", "Latency.", buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+        hist.observe(value, route="/chat")
+
+    assert hist.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/chat",le="0.1"} 2',
+        'latency_seconds_bucket{route="/chat",le="1.0"} 4',
+        'latency_seconds_bucket{route="/chat",le="+Inf"} 5',
+        'latency_seconds_sum{route="/chat"} 4.65',
+        'latency_seconds_count{route="/chat"} 5',
+    ]
+
+
+def test_counter_labels_are_sorted_and_escaped():
+    counter = Counter("events_total", "Events.")
+    counter.inc(kind="a", call='say "hi"\\\n')
+    counter.inc(2, call='say "hi"\\\n', kind="a")
+    counter.inc(0.5)
+
+    assert counter.render()[2:] == [
+        'events_total{call="say \\"hi\\"\\\\\\n",kind="a"} 3',
+        "events_total 0.5",
+    ]
+
+
+def test_collectors_are_rendered_at_scrape_time(monkeypatch):
+    monkeypatch.setattr(metrics, "_collectors", [])
+    size = {"n": 1}
+
+    def collect():
+        yield "cache_entries", {"backend": "memory"}, size["n"]
+        yield "cache_entries", {"backend": "snapshot"}, 2.5
+
+    register_collector("cache_entries", "gauge", "Entries.", collect)
+    size["n"] = 7
+    text = render_latest()
+
+    assert text.endswith("\n")
+    assert "# HELP cache_entries Entries.\n# TYPE cache_entries gauge\n" in text
+    assert 'cache_entries{backend="memory"} 7\n' in text
+    assert 'cache_entries{backend="snapshot"} 2.5\n' in text
+
+
+def _run_app(app, route_path="/items/{item_id}", path="/items/42"):
+    async def inner(scope, receive, send):
+        with span("lookup"):
+            scope["route"] = SimpleNamespace(path=route_path)  # what the router sets
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    asyncio.run(app(inner)(scope, receive, send))
+    return sent
+
+
+def _request_count(route: str, status: str) -> int:
+    key = metrics._labels({"method": "GET", "route": route, "status": status})
+    series = metrics.REQUEST_SECONDS._series.get(key)
+    return series[2] if series else 0
+
+
+def test_middleware_labels_requests_by_route_template():
+    before = _request_count("/items/{item_id}", "201")
+    sent = _run_app(lambda inner: MetricsMiddleware(inner))
+
+    assert _request_count("/items/{item_id}", "201") == before + 1
+    assert all(b"server-timing" not in dict(m.get("headers", [])) for m in sent)
+
+
+def test_middleware_adds_server_timing():
+    sent = _run_app(lambda inner: MetricsMiddleware(inner, server_timing=True))
+    headers = dict(sent[0]["headers"])
+
+    entries = headers[b"server-timing"].decode().split(", ")
+    assert entries[0].startswith("lookup;dur=")
+    assert entries[-1].startswith("total;dur=")
+
+
+def test_middleware_uses_route_template_with_fastapi():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, server_timing=True)
+
+    @app.get("/characters/{name}")
+    def character(name: str):
+        with span("facts_lookup"):
+            return {"name": name}
+
+    before = _request_count("/characters/{name}", "200")
+    response = TestClient(app).get("/characters/ada")
+
+    assert response.status_code == 200
+    assert "facts_lookup;dur=" in response.headers["server-timing"]
+    assert _request_count("/characters/{name}", "200") == before + 1
+    assert _request_count("/characters/ada", "200") == 0
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+
+import prompts
+from prompts import (
+    CHARACTER_INSTRUCTIONS,
+    NARRATOR_INSTRUCTIONS,
+    PromptCacheStats,
+    cached_tokens,
+    prompt_cache_key,
+    render_system_message,
+)
+
+
+def _info(**overrides):
+    facts = {
+        "background": "Mathematician",
+        "notable_works": "Notes on the Analytical Engine",
+        "occupation": "Writer",
+        "first_appearance": "1815",
+        "era": "19th century",
+    }
+    facts.update(overrides)
+    return SimpleNamespace(**facts)
+
+
+@pytest.fixture(autouse=True)
+def fresh_render_cache():
+    prompts._render.cache_clear()
+    yield
+    prompts._render.cache_clear()
+
+
+def test_render_is_memoized_per_character_role_and_facts():
+    first = render_system_message("Ada Lovelace", True, _info())
+    assert render_system_message("Ada Lovelace", True, _info()) is first
+    info = prompts._render.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+    changed = render_system_message("Ada Lovelace", True, _info(era="Victorian"))
+    assert changed != first and "Victorian" in changed
+    render_system_message("Ada Lovelace", False, _info())
+    assert prompts._render.cache_info().misses == 3
+
+
+def test_static_instructions_come_before_the_character():
+    character = render_system_message("Ada Lovelace", True, _info())
+    narrator = render_system_message("Ada Lovelace", False, _info())
+
+    assert character.startswith(CHARACTER_INSTRUCTIONS)
+    assert narrator.startswith(NARRATOR_INSTRUCTIONS)
+    assert "Ada Lovelace" not in CHARACTER_INSTRUCTIONS + NARRATOR_INSTRUCTIONS
+    assert character.index("Ada Lovelace") > len(CHARACTER_INSTRUCTIONS)
+    assert character.index("Ada Lovelace") < character.index("Mathematician")
+    # Different characters share the whole instruction prefix
+    other = render_system_message("Alan Turing", True, _info())
+    assert other[: len(CHARACTER_INSTRUCTIONS)] == character[: len(CHARACTER_INSTRUCTIONS)]
+
+
+def test_prompt_cache_key_normalizes_name_and_role():
+    assert prompt_cache_key("  Ada   LOVELACE ", True) == prompt_cache_key("ada lovelace", True) == "character:ada lovelace"
+    assert prompt_cache_key("Ada Lovelace", False) == "narrator:ada lovelace"
+
+
+def _sdk_usage(prompt_tokens, cached):
+    details = None if cached is None else SimpleNamespace(cached_tokens=cached)
+    return SimpleNamespace(prompt_tokens=prompt_tokens, prompt_tokens_details=details)
+
+
+def _dict_usage(prompt_tokens, cached):
+    details = None if cached is None else {"cached_tokens": cached}
+    return {"prompt_tokens": prompt_tokens, "prompt_tokens_details": details}
+
+
+@pytest.mark.parametrize("make_usage", [_sdk_usage, _dict_usage])
+def test_cached_tokens_and_record(make_usage):
+    assert cached_tokens(make_usage(100, 64)) == 64
+    assert cached_tokens(make_usage(100, None)) == 0
+    assert cached_tokens(make_usage(100, 0)) == 0
+
+    stats = PromptCacheStats()
+    assert stats.record(make_usage(1000, 768)) == 768
+    assert stats.record(make_usage(1000, None)) == 0
+    assert stats.record(None) == 0
+    totals = stats.stats()
+    assert (totals["requests"], totals["prompt_tokens"], totals["cached_prompt_tokens"]) == (2, 2000, 768)
+    assert totals["hit_rate"] == 0.384
+
+
+def test_record_accepts_openai_usage_objects():
+    usage_types = pytest.importorskip("openai.types.completion_usage")
+    usage = usage_types.CompletionUsage(
+        prompt_tokens=1200,
+        completion_tokens=10,
+        total_tokens=1210,
+        prompt_tokens_details=usage_types.PromptTokensDetails(cached_tokens=1024),
+    )
+    stats = PromptCacheStats()
+    assert stats.record(usage) == 1024
+    # The stream path passes usage.model_dump()
+    assert stats.record(usage.model_dump()) == 1024
+    assert stats.stats()["cached_prompt_tokens"] == 2048
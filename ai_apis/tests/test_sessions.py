@@ -0,0 +1,166 @@
+import pytest
+
+import sessions
+from history import HistoryManager
+from sessions import MemorySessionStore, SqliteSessionStore, session_store_from_env
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(sessions, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path, clock):
+    def make(max_sessions=1000, max_turns=40, idle_ttl_seconds=3600.0):
+        if request.param == "memory":
+            return MemorySessionStore(max_sessions, max_turns, idle_ttl_seconds)
+        return SqliteSessionStore(str(tmp_path / "sessions.sqlite3"), max_sessions, max_turns, idle_ttl_seconds)
+
+    return make
+
+
+def _create(store, turns=()):
+    return store.create("Ada Lovelace", "Ada Lovelace", True, {"era": "Victorian"}, "You are Ada.", turns)
+
+
+def _contents(session):
+    return [t["content"] for t in session.turns]
+
+
+def test_create_get_and_append(make_store):
+    store = make_store()
+    created = _create(store, [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}])
+    store.append(created.session_id, "how are you?", "well")
+
+    session = store.get(created.session_id)
+    assert session.facts == {"era": "Victorian"}
+    assert session.system_prompt == "You are Ada."
+    assert session.is_character
+    assert _contents(session) == ["hi", "hello", "how are you?", "well"]
+    assert session.summary is None and session.folded == 0
+    assert store.get("missing") is None
+    stats = store.stats()
+    assert (stats["created"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_fold_replaces_summary_and_drops_folded_turns(make_store):
+    store = make_store(max_turns=4)
+    session_id = _create(store).session_id
+    for i in range(3):
+        store.append(session_id, f"u{i}", f"a{i}")
+
+    assert store.fold(session_id, "first two turns", 4)
+    session = store.get(session_id)
+    assert session.summary == "first two turns"
+    assert session.folded == 4
+    assert _contents(session) == ["u2", "a2"]
+
+    # A concurrent turn that planned the same fold finds it done
+    assert not store.fold(session_id, "stale", 4)
+    assert store.get(session_id).summary == "first two turns"
+
+    store.append(session_id, "u3", "a3")
+    assert _contents(store.get(session_id)) == ["u2", "a2", "u3", "a3"]
+
+
+def test_unfolded_turns_are_capped(make_store):
+    store = make_store(max_turns=4)
+    session_id = _create(store).session_id
+    for i in range(6):
+        store.append(session_id, f"u{i}", f"a{i}")
+
+    session = store.get(session_id)
+    assert len(session.turns) == 2 * store.max_turns
+    assert session.folded == 4
+    assert _contents(session)[0] == "u2"
+
+
+def test_least_recently_used_session_is_evicted(make_store, clock):
+    store = make_store(max_sessions=2)
+    first = _create(store).session_id
+    clock.now += 1
+    second = _create(store).session_id
+    clock.now += 1
+    assert store.get(first) is not None  # `second` is now least recently used
+    clock.now += 1
+    third = _create(store).session_id
+
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    assert store.stats()["evictions"] == 1
+    assert len(store) == 2
+
+
+def test_idle_sessions_expire(make_store, clock):
+    store = make_store(idle_ttl_seconds=60)
+    session_id = _create(store).session_id
+    clock.now += 59
+    assert store.get(session_id) is not None  # touching it resets the idle clock
+    clock.now += 59
+    assert store.get(session_id) is not None
+    clock.now += 61
+    assert store.get(session_id) is None
+    assert len(store) == 0
+
+
+def test_delete_and_clear(make_store):
+    store = make_store()
+    first = _create(store).session_id
+    _create(store)
+    assert store.delete(first)
+    assert not store.delete(first)
+    assert len(store) == 1
+    store.clear()
+    assert len(store) == 0
+
+
+def test_sessions_survive_a_second_worker(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    session_id = _create(SqliteSessionStore(path)).session_id
+    other = SqliteSessionStore(path)
+    other.append(session_id, "hi", "hello")
+    assert _contents(SqliteSessionStore(path).get(session_id)) == ["hi", "hello"]
+
+
+def test_rolling_summary_is_refreshed_every_few_turns(make_store):
+    # Drive fold_point the way the session chat path does
+    store = make_store(max_turns=40)
+    manager = HistoryManager(budget_tokens=100000)
+    session_id = _create(store).session_id
+    calls = 0
+    for t in range(100):
+        session = store.get(session_id)
+        cut = manager.fold_point(session.turns, session.summary is not None, store.max_turns)
+        if cut:
+            calls += 1
+            assert store.fold(session_id, f"summary after turn {t}", session.folded + cut)
+        store.append(session_id, f"u{t}", f"a{t}")
+
+    session = store.get(session_id)
+    assert calls <= 10
+    assert len(session.turns) <= store.max_turns + 2
+    # Nothing was dropped without being folded
+    assert session.folded + len(session.turns) == 200
+
+
+def test_session_store_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("SESSION_STORE_BACKEND", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setenv("SESSION_MAX_TURNS", "10")
+    store = session_store_from_env()
+    assert isinstance(store, SqliteSessionStore) and store.max_turns == 10
+
+    monkeypatch.setenv("SESSION_STORE_BACKEND", "redis")
+    with pytest.raises(RuntimeError):
+        session_store_from_env()
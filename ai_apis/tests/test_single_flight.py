@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_async_followers_share_one_call():
+    flight = AsyncSingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "facts"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("ada", fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["facts"] * 5
+    assert calls == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_async_cancelled_leader_does_not_cancel_followers():
+    flight = AsyncSingleFlight()
+    release = None
+
+    async def fetch():
+        await release.wait()
+        return "facts"
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.ensure_future(flight.do("ada", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("ada", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "facts"
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_error_reaches_every_caller():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("ada", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_sync_followers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+    started = threading.Event()
+
+    def fetch():
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.05)
+        return "facts"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("ada", fetch)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flight.do("ada", fetch))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert results == ["facts"] * 4
+    assert calls == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 3, "in_flight": 0}
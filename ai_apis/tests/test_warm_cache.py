@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from warm_cache import fetch_all, read_checkpoint, read_names
+
+
+def test_read_names_dedupes_and_skips_bad_jsonl_rows(tmp_path):
+    txt = tmp_path / "names.txt"
+    txt.write_text("# comment\nAlbert Einstein\n\n  albert   einstein \nAda Lovelace\n", encoding="utf-8")
+    jsonl = tmp_path / "more.jsonl"
+    jsonl.write_text(
+        "\n".join(
+            [
+                json.dumps({"character_name": "Sherlock Holmes"}),
+                json.dumps({"name": "Gandalf"}),
+                json.dumps(["a", "list"]),
+                json.dumps("just a string"),
+                json.dumps({"other": "field"}),
+                "{not json",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    assert read_names([str(txt), str(jsonl)]) == ["Albert Einstein", "Ada Lovelace", "Sherlock Holmes", "Gandalf"]
+
+
+def test_read_checkpoint_skips_torn_and_foreign_lines(tmp_path):
+    path = tmp_path / "facts.snapshot.checkpoint.jsonl"
+    good = {"character_name": "Ada", "data": {"era": "Victorian"}}
+    path.write_text(json.dumps(good) + "\n[1, 2]\n" + '{"character_name": "Bob"}\n' + '{"character_na', encoding="utf-8")
+
+    assert read_checkpoint(str(path)) == {"ada": good}
+
+
+def test_placeholder_facts_are_failed_not_checkpointed(tmp_path, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("openai")
+    monkeypatch.setenv("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY", "test-key"))
+    import main
+
+    def fake_fetch(name, force_tool=True):
+        if name == "Nobody":
+            return main.ToolData(**main.get_character_profile_information())
+        return main.ToolData(background=f"{name} bio", notable_works="-", occupation="-", first_appearance="-", era="-")
+
+    monkeypatch.setattr(main, "fetch_character_info", fake_fetch)
+    checkpoint = str(tmp_path / "facts.checkpoint.jsonl")
+    assert fetch_all(["Ada", "Nobody"], checkpoint, concurrency=2) == 1
+    assert list(read_checkpoint(checkpoint)) == ["ada"]
@@ -0,0 +1,122 @@
+"""Fetch facts for a list of characters and build a facts snapshot.
+
+    python warm_cache.py names.txt more_names.jsonl --out facts.snapshot --concurrency 8
+
+Inputs are plain text (one name per line) or JSONL with a ``character_name``
+or ``name`` field. Every fetched record is appended to a checkpoint file
+(``<out>.checkpoint.jsonl`` by default), so an interrupted run resumes where
+it stopped. The snapshot is rebuilt from the checkpoint at the end; point the
+API at it with ``FACTS_SNAPSHOT_PATH``.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+from facts_cache import normalize_name
+from facts_snapshot import write_snapshot
+
+
+def read_names(paths: List[str]) -> List[str]:
+    names: Dict[str, str] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if path.endswith(".jsonl"):
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if not isinstance(row, dict):
+                        continue
+                    line = str(row.get("character_name") or row.get("name") or "").strip()
+                    if not line:
+                        continue
+                names.setdefault(normalize_name(line), line)
+    return list(names.values())
+
+
+def read_checkpoint(path: str) -> Dict[str, dict]:
+    done: Dict[str, dict] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if not isinstance(row, dict) or "character_name" not in row or "data" not in row:
+                continue
+            done[normalize_name(row["character_name"])] = row
+    return done
+
+
+def fetch_all(names: List[str], checkpoint: str, concurrency: int) -> int:
+    # Imported lazily: building a snapshot from an existing checkpoint needs no API key
+    from main import fetch_character_info, is_placeholder_facts
+
+    lock = threading.Lock()
+    failed = 0
+    started = time.time()
+
+    def fetch(name: str) -> dict:
+        info = fetch_character_info(name, force_tool=True)
+        if is_placeholder_facts(info):
+            # Unparseable or empty tool output; keep it out of the checkpoint so a re-run retries it
+            raise ValueError("no facts returned")
+        return {"character_name": name, "data": info.dict()}
+
+    with open(checkpoint, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fetch, name): name for name in names}
+        for n, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  ! {name}: {getattr(e, 'detail', e)}", file=sys.stderr)
+                continue
+            with lock:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+            if n % 50 == 0 or n == len(names):
+                print(f"  {n}/{len(names)} fetched ({time.time() - started:.0f}s)")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", help="name lists (.txt or .jsonl)")
+    parser.add_argument("--out", default="facts.snapshot", help="snapshot path")
+    parser.add_argument("--checkpoint", help="checkpoint JSONL (default: <out>.checkpoint.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel upstream lookups")
+    parser.add_argument("--no-fetch", action="store_true", help="only rebuild the snapshot from the checkpoint")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{args.out}.checkpoint.jsonl"
+
+    if not args.no_fetch:
+        names = read_names(args.inputs)
+        done = read_checkpoint(checkpoint)
+        todo = [n for n in names if normalize_name(n) not in done]
+        print(f"{len(names)} names, {len(names) - len(todo)} already in checkpoint, {len(todo)} to fetch")
+        if todo:
+            failed = fetch_all(todo, checkpoint, max(1, args.concurrency))
+            if failed:
+                print(f"{failed} failed; re-run to retry them", file=sys.stderr)
+
+    rows = read_checkpoint(checkpoint).values()
+    count = write_snapshot(args.out, ((row["character_name"], row["data"]) for row in rows))
+    print(f"wrote {count} characters to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 import Card from "@/components/ui/Card";
 import { IconButton } from "@/components/ui/IconButton";
 import { useEffect, useRef, useState } from "react";
-import { postChat } from "@/lib/postChat";
-
-const MAX_CONTEXT = 12;
+import { HttpError } from "@/lib/api";
+import { createChatSession, deleteChatSession } from "@/lib/chatSession";
+import { postChatStream, postSessionChatStream } from "@/lib/postChatStream";
+
+// Turns sent with a stateless turn or used to seed a new server session
+const MAX_CONTEXT = 40;
+// Server-side sessions only help when every API worker shares the session store
+// (SESSION_STORE_BACKEND=sqlite); otherwise each turn carries its own history
+const USE_SESSIONS = import.meta.env.VITE_CHAT_SESSIONS === "true";
 type ChatPanelProps = {
   character?: { name: string; avatarUrl?: string } | undefined;
   loading?: boolean; 
@@ -23,19 +29,35 @@ export default function ChatPanel({ character, loading }: ChatPanelProps) {
   const [message, setMessage] = useState("");
   const [messages, setMessages] = useState<Msg[]>([]);
   const [typing, setTyping] = useState(false);
+  const [streamingId, setStreamingId] = useState<string | null>(null);
 
   const listRef = useRef<HTMLDivElement | null>(null);
+  // server session id per (character, tab)
+  const sessionsRef = useRef<Record<string, string>>({});
 
   const hasCharacter = !!character?.name;
 
   const thread = messages.filter((m) => m.mode === mode);
+  const lastTextLength = thread[thread.length - 1]?.text.length ?? 0; // grows while streaming
 
   useEffect(() => {
     listRef.current?.scrollTo({
       top: listRef.current.scrollHeight,
       behavior: "smooth",
     });
-  }, [mode, thread.length, typing]);
+  }, [mode, thread.length, typing, lastTextLength]);
+
+  function sessionKey(m: Mode) {
+    return `${character?.name ?? ""}\u0000${m}`;
+  }
+
+  function forgetSession(m: Mode) {
+    const key = sessionKey(m);
+    const id = sessionsRef.current[key];
+    if (!id) return;
+    delete sessionsRef.current[key];
+    deleteChatSession(id).catch(() => {});
+  }
 
   function stamp() {
     const d = new Date();
@@ -96,39 +118,89 @@ export default function ChatPanel({ character, loading }: ChatPanelProps) {
     setTyping(true);
 
     try {
-      // 2) build lightweight history (only this tab), last N turns
-      const threadNow = [...messages.filter((m) => m.mode === mode), userMsg];
-      const recent = threadNow.slice(-MAX_CONTEXT);
-      const historyForApi = recent
-        .filter((m) => m.role === "user" || m.role === "assistant")
+      // 2) earlier turns of this tab, last N
+      const historyForApi = messages
+        .filter((m) => m.mode === mode)
+        .slice(-MAX_CONTEXT)
         .map((m) => ({
           role: m.role,
           content: m.role === "assistant" ? cleanAssistantText(m.text) : m.text,
         }));
 
-      // 3) choose role for server
+      // 3) choose role for server; one session per (character, tab)
       const roleForServer = mode === "in" ? character!.name : "Narrator";
+      const key = sessionKey(mode);
+      const openSession = async () => {
+        const session = await createChatSession({
+          character_name: character!.name,
+          role: roleForServer,
+          history: historyForApi,
+        });
+        sessionsRef.current[key] = session.session_id;
+        return session.session_id;
+      };
 
-      // 4) call FastAPI /chat
-      const resp = await postChat({
-        character_name: character!.name,
-        role: roleForServer,
-        user_message: text,
-        history: historyForApi as any, // backend accepts "system|user|assistant|tool" but we only send user/assistant
-      });
-
-      // 5) append assistant reply
+      // 4) stream the turn; the bubble is created on the first token
       const assistantName = mode === "in" ? character!.name : "Narrator";
-      const assistantText = `(${assistantName}) ${resp.assistant_text || ""}`.trim();
-
-      const botMsg: Msg = {
-        id: crypto.randomUUID(),
-        role: "assistant",
-        text: assistantText,
-        time: stamp(),
-        mode,
+      const botId = crypto.randomUUID();
+      let started = false;
+
+      const handlers = {
+        onToken: (delta: string) => {
+          if (!started) {
+            started = true;
+            setStreamingId(botId);
+            setMessages((m) => [
+              ...m,
+              { id: botId, role: "assistant", text: `(${assistantName}) `, time: stamp(), mode },
+            ]);
+          }
+          setMessages((m) =>
+            m.map((x) => (x.id === botId ? { ...x, text: x.text + delta } : x))
+          );
+        },
       };
-      setMessages((m) => [...m, botMsg]);
+      const streamStateless = () =>
+        postChatStream(
+          {
+            character_name: character!.name,
+            role: roleForServer,
+            user_message: text,
+            history: historyForApi,
+          },
+          handlers
+        );
+
+      let fullText: string;
+      if (!USE_SESSIONS) {
+        fullText = await streamStateless();
+      } else {
+        try {
+          fullText = await postSessionChatStream(
+            sessionsRef.current[key] ?? (await openSession()),
+            text,
+            handlers
+          );
+        } catch (err) {
+          // Session expired or was evicted: answer this turn statelessly and
+          // open a fresh session on the next one
+          if (!(err instanceof HttpError && err.status === 404)) throw err;
+          delete sessionsRef.current[key];
+          fullText = await streamStateless();
+        }
+      }
+
+      // 5) empty completion: still show a reply bubble
+      if (!started) {
+        const botMsg: Msg = {
+          id: botId,
+          role: "assistant",
+          text: `(${assistantName}) ${fullText}`.trim(),
+          time: stamp(),
+          mode,
+        };
+        setMessages((m) => [...m, botMsg]);
+      }
     } catch (err) {
       console.error("Chat error:", err);
       const botMsg: Msg = {
@@ -141,6 +213,7 @@ export default function ChatPanel({ character, loading }: ChatPanelProps) {
       setMessages((m) => [...m, botMsg]);
     } finally {
       setTyping(false);
+      setStreamingId(null);
     }
   };
 
@@ -207,9 +280,10 @@ export default function ChatPanel({ character, loading }: ChatPanelProps) {
         <div className="flex items-center gap-2">
           <IconButton
             label="Clear"
-            onClick={() =>
-              setMessages((ms) => ms.filter((m) => m.mode !== mode))
-            }
+            onClick={() => {
+              forgetSession(mode);
+              setMessages((ms) => ms.filter((m) => m.mode !== mode));
+            }}
           >
             <svg width="16" height="16" viewBox="0 0 24 24">
               <path
@@ -231,6 +305,7 @@ export default function ChatPanel({ character, loading }: ChatPanelProps) {
           <IconButton
             label="Reset"
             onClick={() => {
+              forgetSession(mode);
               setMessages((ms) => ms.filter((m) => m.mode !== mode));
               setMode("in");
             }}
@@ -390,7 +465,7 @@ export default function ChatPanel({ character, loading }: ChatPanelProps) {
                     );
                   })}
 
-                  {typing && <TypingSkeletonRow />}
+                  {typing && !streamingId && <TypingSkeletonRow />}
                 </>
               )}
             </div>
@@ -1,14 +1,65 @@
 import Card from "@/components/ui/Card";
-function Row({ title, items, icon }: { title: string; items: string; icon: React.ReactNode }) {
+
+type Example = { label: string; name: string };
+
+// Suggested characters; their facts are prefetched in one batch call (see Main)
+export const DISCOVER_EXAMPLES: Record<string, Example[]> = {
+  historical: [
+    { label: "Einstein", name: "Albert Einstein" },
+    { label: "Shakespeare", name: "William Shakespeare" },
+    { label: "Cleopatra", name: "Cleopatra" },
+  ],
+  literary: [
+    { label: "Sherlock Holmes", name: "Sherlock Holmes" },
+    { label: "Elizabeth Bennet", name: "Elizabeth Bennet" },
+  ],
+  pop: [
+    { label: "Batman", name: "Batman" },
+    { label: "Gandalf", name: "Gandalf" },
+    { label: "Hermione", name: "Hermione Granger" },
+  ],
+};
+
+export const DISCOVER_NAMES = Object.values(DISCOVER_EXAMPLES).flatMap((group) =>
+  group.map((e) => e.name)
+);
+
+function Row({
+  title,
+  items,
+  icon,
+  onPick,
+}: {
+  title: string;
+  items: Example[];
+  icon: React.ReactNode;
+  onPick?: (name: string) => void;
+}) {
   return (
     <div className="flex flex-col items-center gap-2">
       <div className="text-subtle">{icon}</div>
       <div className="text-sm font-semibold text-ink">{title}</div>
-      <div className="text-xs text-muted text-center leading-5">{items}</div>
+      <div className="text-xs text-muted text-center leading-5">
+        {items.map((e, i) => (
+          <span key={e.name}>
+            {i > 0 && ", "}
+            {onPick ? (
+              <button type="button" className="hover:text-ink hover:underline" onClick={() => onPick(e.name)}>
+                {e.label}
+              </button>
+            ) : (
+              e.label
+            )}
+          </span>
+        ))}
+      </div>
     </div>
   );
 }
-export default function PlaceholderCard() {
+
+type Props = { onPick?: (name: string) => void };
+
+export default function PlaceholderCard({ onPick }: Props) {
   return (
     <Card className="p-8 text-center">
       <div className="mx-auto mb-6 flex h-16 w-16 items-center justify-center rounded-full bg-canvas">
@@ -26,7 +77,8 @@ export default function PlaceholderCard() {
       <div className="mt-8 grid grid-cols-3 gap-6">
         <Row
           title="Historical Figures"
-          items="Einstein, Shakespeare, Cleopatra"
+          items={DISCOVER_EXAMPLES.historical}
+          onPick={onPick}
           icon={
             <svg width="22" height="22" viewBox="0 0 24 24">
               <path fill="currentColor" d="M12 12a5 5 0 1 0-5-5a5 5 0 0 0 5 5m-7 8a7 7 0 0 1 14 0z"/>
@@ -35,7 +87,8 @@ export default function PlaceholderCard() {
         />
         <Row
           title="Literary Characters"
-          items="Sherlock Holmes, Elizabeth Bennet"
+          items={DISCOVER_EXAMPLES.literary}
+          onPick={onPick}
           icon={
             <svg width="22" height="22" viewBox="0 0 24 24">
               <path fill="currentColor" d="M4 5h16v2H4zm0 4h10v2H4zm0 4h16v2H4z"/>
@@ -44,7 +97,8 @@ export default function PlaceholderCard() {
         />
         <Row
           title="Pop Culture Icons"
-          items="Batman, Gandalf, Hermione"
+          items={DISCOVER_EXAMPLES.pop}
+          onPick={onPick}
           icon={
             <svg width="22" height="22" viewBox="0 0 24 24">
               <path fill="currentColor" d="m12 2l1.9 5.9H20l-4.9 3.6l1.9 5.9L12 13.8L7 17.4l1.9-5.9L4 7.9h6.1z"/>
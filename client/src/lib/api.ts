@@ -1,6 +1,16 @@
 const BASE_URL =
   import.meta.env.VITE_API_BASE_URL?.replace(/\/+$/, "") || "http://localhost:8000";
 
+// Keeps the status so callers can react to e.g. an expired session (404)
+class HttpError extends Error {
+  status: number;
+
+  constructor(status: number, message: string) {
+    super(message);
+    this.status = status;
+  }
+}
+
 async function request<T>(path: string, init: RequestInit): Promise<T> {
   const res = await fetch(`${BASE_URL}${path}`, {
     headers: { "Content-Type": "application/json", ...(init.headers || {}) },
@@ -8,9 +18,9 @@ async function request<T>(path: string, init: RequestInit): Promise<T> {
   });
   if (!res.ok) {
     const text = await res.text().catch(() => "");
-    throw new Error(`HTTP ${res.status}: ${text || res.statusText}`);
+    throw new HttpError(res.status, `HTTP ${res.status}: ${text || res.statusText}`);
   }
   return (await res.json()) as T;
 }
 
-export { BASE_URL, request };
\ No newline at end of file
+export { BASE_URL, HttpError, request };
@@ -0,0 +1,29 @@
+// src/lib/chatSession.ts
+import { request } from "./api";
+import type { ChatHistoryItem, ChatRequest, ChatResponse } from "./postChat";
+
+export type ChatSession = Pick<ChatResponse, "character_information" | "system_role_used"> & {
+  session_id: string;
+  max_turns: number;
+  idle_ttl_seconds: number;
+};
+
+// One session per (character, role) tab; the server keeps facts, prompt and recent turns.
+// `history` seeds a replacement session when the previous one expired.
+export async function createChatSession(params: {
+  character_name: string;
+  role: string;
+  character_information?: ChatRequest["character_information"];
+  history?: ChatHistoryItem[];
+}) {
+  return request<ChatSession>("/sessions", {
+    method: "POST",
+    body: JSON.stringify(params),
+  });
+}
+
+export async function deleteChatSession(sessionId: string) {
+  return request<{ deleted: boolean }>(`/sessions/${encodeURIComponent(sessionId)}`, {
+    method: "DELETE",
+  });
+}
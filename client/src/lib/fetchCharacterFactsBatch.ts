@@ -0,0 +1,54 @@
+// src/lib/fetchCharacterFactsBatch.ts
+import { request } from "./api";
+import type { Facts } from "./fetchCharacterFacts";
+
+export type BatchFactsResult = {
+  character_name: string;
+  ok: boolean;
+  cached: boolean;
+  data: Facts | null;
+  error: string | null;
+};
+
+export type BatchFactsResponse = {
+  results: BatchFactsResult[];
+  hits: number;
+  misses: number;
+  failed: number;
+};
+
+// Same key the server uses (facts_cache.normalize_name): collapse whitespace, then casefold.
+// toLowerCase is the closest JS has to casefold.
+export function normalizeName(name: string): string {
+  return name.split(/\s+/).filter(Boolean).join(" ").toLowerCase();
+}
+
+// One round-trip for many characters (e.g. a Discover grid).
+// Returns a map keyed by normalizeName(name); failed names map to null.
+export async function fetchCharacterFactsBatch(
+  names: string[],
+  options: { packSize?: number } = {}
+): Promise<Record<string, Facts | null>> {
+  const character_names = names.map((n) => n.trim()).filter(Boolean);
+  if (character_names.length === 0) return {};
+
+  try {
+    const data = await request<BatchFactsResponse>("/characters/batch", {
+      method: "POST",
+      body: JSON.stringify({
+        character_names,
+        force_tool: true,
+        pack_size: options.packSize ?? 1,
+      }),
+    });
+
+    const byName: Record<string, Facts | null> = {};
+    for (const r of data.results) {
+      byName[normalizeName(r.character_name)] = r.ok ? r.data : null;
+    }
+    return byName;
+  } catch (err) {
+    console.error("Error fetching character facts batch:", err);
+    return {};
+  }
+}
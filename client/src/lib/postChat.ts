@@ -13,9 +13,11 @@ export type ChatResponse = {
   };
   system_role_used: "character" | "narrator";
   assistant_text: string;
+  prompt_tokens: number;
+  cached_prompt_tokens: number;
 };
 
-export async function postChat(params: {
+export type ChatRequest = {
   character_name: string;
   role: string;
   user_message: string;
@@ -27,7 +29,9 @@ export async function postChat(params: {
     first_appearance: string | null;
     era: string;
   };
-}) {
+};
+
+export async function postChat(params: ChatRequest) {
   return request<ChatResponse>("/chat", {
     method: "POST",
     body: JSON.stringify(params),
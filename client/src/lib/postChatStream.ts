@@ -0,0 +1,107 @@
+// src/lib/postChatStream.ts
+import { BASE_URL, HttpError } from "./api";
+import type { ChatRequest, ChatResponse } from "./postChat";
+
+export type ChatStreamMeta = Pick<
+  ChatResponse,
+  "character_information" | "system_role_used" | "prompt_tokens"
+>;
+
+export type ChatStreamUsage = {
+  prompt_tokens: number;
+  completion_tokens: number;
+  total_tokens: number;
+} | null;
+
+export type ChatStreamHandlers = {
+  onMeta?: (meta: ChatStreamMeta) => void;
+  onToken?: (delta: string) => void;
+  onDone?: (info: {
+    finish_reason: string | null;
+    usage: ChatStreamUsage;
+    cached_prompt_tokens: number;
+  }) => void;
+};
+
+// POST /chat/stream and dispatch SSE events as they arrive.
+// Resolves with the full assistant text once the stream ends.
+export async function postChatStream(
+  params: ChatRequest,
+  handlers: ChatStreamHandlers = {},
+  signal?: AbortSignal
+): Promise<string> {
+  return streamChat("/chat/stream", params, handlers, signal);
+}
+
+// Same events for a server-side session; only the new message is sent.
+export async function postSessionChatStream(
+  sessionId: string,
+  userMessage: string,
+  handlers: ChatStreamHandlers = {},
+  signal?: AbortSignal
+): Promise<string> {
+  return streamChat(
+    `/sessions/${encodeURIComponent(sessionId)}/chat/stream`,
+    { user_message: userMessage },
+    handlers,
+    signal
+  );
+}
+
+async function streamChat(
+  path: string,
+  body: unknown,
+  handlers: ChatStreamHandlers,
+  signal?: AbortSignal
+): Promise<string> {
+  const res = await fetch(`${BASE_URL}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify(body),
+    signal,
+  });
+  if (!res.ok || !res.body) {
+    const text = await res.text().catch(() => "");
+    throw new HttpError(res.status, `HTTP ${res.status}: ${text || res.statusText}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let fullText = "";
+
+  const dispatch = (raw: string) => {
+    let event = "message";
+    const dataLines: string[] = [];
+    for (const line of raw.split("\n")) {
+      if (line.startsWith("event:")) event = line.slice(6).trim();
+      else if (line.startsWith("data:")) dataLines.push(line.slice(5).trimStart());
+    }
+    if (dataLines.length === 0) return;
+    const data = JSON.parse(dataLines.join("\n"));
+
+    if (event === "meta") handlers.onMeta?.(data);
+    else if (event === "token") {
+      fullText += data.delta;
+      handlers.onToken?.(data.delta);
+    } else if (event === "done") handlers.onDone?.(data);
+    else if (event === "error") throw new Error(data.detail || "Stream error");
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // events are separated by a blank line
+    let sep = buffer.indexOf("\n\n");
+    while (sep !== -1) {
+      dispatch(buffer.slice(0, sep));
+      buffer = buffer.slice(sep + 2);
+      sep = buffer.indexOf("\n\n");
+    }
+  }
+  if (buffer.trim()) dispatch(buffer);
+
+  return fullText;
+}
@@ -1,13 +1,14 @@
 // src/pages/main/main.tsx
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import Header from "@/components/Header";
 import SearchCard from "@/components/sections/SearchCard";
 import DiscoverCard from "@/components/sections/DiscoverCard";
 import ChatPanel from "@/components/sections/ChatPanel";
 import SkeletonCard from "@/components/sections/SkeletonCard";
-import PlaceholderCard from "@/components/ui/PlaceholderCard";
+import PlaceholderCard, { DISCOVER_NAMES } from "@/components/ui/PlaceholderCard";
 import { fetchCharacterImage, unknownAvatar } from "@/lib/fetchCharacterImage";
-import { fetchCharacterFacts } from "@/lib/fetchCharacterFacts";
+import { fetchCharacterFacts, type Facts } from "@/lib/fetchCharacterFacts";
+import { fetchCharacterFactsBatch, normalizeName } from "@/lib/fetchCharacterFactsBatch";
 
 type Status = "idle" | "loading" | "done";
 type Result = {
@@ -27,6 +28,12 @@ export default function Main() {
   const [status, setStatus] = useState<Status>("idle");
   const [result, setResult] = useState<Result | null>(null);
   const [chatKey, setChatKey] = useState(0); // remount ChatPanel to clear chats
+  // facts for the suggested characters, fetched in one round-trip
+  const [prefetched, setPrefetched] = useState<Record<string, Facts | null>>({});
+
+  useEffect(() => {
+    fetchCharacterFactsBatch(DISCOVER_NAMES).then(setPrefetched);
+  }, []);
 
   const doSearch = async (raw: string) => {
   const nextName = raw.trim();
@@ -45,7 +52,7 @@ export default function Main() {
         const wikiImg = await fetchCharacterImage(nextName);
         return wikiImg ?? unknownAvatar(64);
       })(),
-      fetchCharacterFacts(nextName),
+      prefetched[normalizeName(nextName)] ?? fetchCharacterFacts(nextName),
     ]);
 
     // normalize works to string[]
@@ -92,7 +99,7 @@ export default function Main() {
           <div className="space-y-6">
             <SearchCard loading={status === "loading"} onSearch={doSearch} />
 
-            {status === "idle" && <PlaceholderCard />}
+            {status === "idle" && <PlaceholderCard onPick={doSearch} />}
             {status === "loading" && <SkeletonCard />}
             {status === "done" && result && <DiscoverCard data={result} />}
           </div>